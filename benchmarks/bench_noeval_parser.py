@@ -0,0 +1,119 @@
+#! /usr/bin/env python3
+'''
+Benchmark for bap.noeval_parser
+
+Parses the same ADT input with every parsing engine and reports the
+time each of them took. The input is either an ADT dump produced with
+`bap FILE -dadt > FILE.adt', or a synthetic project of a given size:
+
+    python benchmarks/bench_noeval_parser.py FILE.adt
+    python benchmarks/bench_noeval_parser.py --synthetic 2000
+'''
+import argparse
+import io
+import sys
+import time
+
+from multiprocessing import cpu_count
+
+from bap import adt, binfmt, noeval_parser
+
+SUB = ('Sub(Tid({tid}, "@sub_{n}"), Attrs([Attr("address","0x{addr:x}:64u"), '
+       'Attr("stub","()")]), "sub_{n}", Args([]), Blks([{blks}]))')
+BLK = ('Blk(Tid({tid}, "%{tid:08x}"), Attrs([Attr("address","0x{addr:x}:64u")]), '
+       'Phis([]), Defs([{defs}]), Jmps([Goto(Tid({jid}, "%{jid:08x}"), '
+       'Attrs([Attr("insn","\\"jmp 0x{addr:x}\\"")]), Int(0x1,0x1), '
+       'Direct(Tid({tid}, "%{tid:08x}")))]))')
+DEF = ('Def(Tid({tid}, "%{tid:08x}"), Attrs([Attr("address","0x{addr:x}:64u"), '
+       'Attr("insn","\\"addq $0x8, %rsp\\"")]), Var("RSP",Imm(0x40)), '
+       'PLUS(Var("RSP",Imm(0x40)),Int(0x8,0x40)))')
+
+def synthetic_project(nsubs, nblks=4, ndefs=8):
+    '''
+    Return an ADT string of a project with nsubs subroutines
+    '''
+    tid = [0x10]
+    def fresh():
+        tid[0] += 1
+        return tid[0]
+    subs = []
+    for n in range(nsubs):
+        addr = 0x400000 + n * 0x100
+        blks = []
+        for _ in range(nblks):
+            defs = ', '.join(DEF.format(tid=fresh(), addr=addr)
+                             for _ in range(ndefs))
+            blks.append(BLK.format(tid=fresh(), jid=fresh(), addr=addr, defs=defs))
+        subs.append(SUB.format(tid=fresh(), n=n, addr=addr, blks=', '.join(blks)))
+    return ('Project(Attrs([Attr("filename","\\"synthetic\\"")]), '
+            'Sections([Section(".text", 400000, "\\x90\\x90")]), '
+            'Memmap([Annotation(Region(400000,400001), Attr("section","\\".text\\""))]), '
+            'Program(Tid(0x1, "%00000001"), Attrs([]), Subs([{0}])))'.format(', '.join(subs)))
+
+def timeit(func, *args, **kwargs):
+    '''
+    Return (result, seconds) of calling func
+    '''
+    start = time.time()
+    result = func(*args, **kwargs)
+    return result, time.time() - start
+
+def feed(text, size):
+    '''
+    Parse text with an incremental parser in chunks of the given size
+    '''
+    adt = noeval_parser.IncrementalParser()
+    for pos in range(0, len(text), size):
+        adt.feed(text[pos:pos+size])
+    return adt.close()
+
+def main(argv=None):
+    '''
+    Run the benchmark and print the report
+    '''
+    args = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    args.add_argument('input', nargs='?', help='ADT dump to parse')
+    args.add_argument('--synthetic', type=int, default=1000, metavar='N',
+                      help='number of subroutines in a synthetic project')
+    args.add_argument('--engines', default=','.join(sorted(noeval_parser.ENGINES)),
+                      help='comma separated list of engines to benchmark')
+    args.add_argument('--chunk', type=int, default=1 << 16, metavar='SIZE',
+                      help='chunk size for the incremental parser')
+    args.add_argument('--processes', type=int, default=None, metavar='N',
+                      help='number of processes for the parallel parser')
+    args.add_argument('--memory', action='store_true',
+                      help='report memory saved by sharing strings and leaves')
+    opts = args.parse_args(argv)
+    if opts.input:
+        with open(opts.input) as fobj:
+            text = fobj.read()
+    else:
+        text = synthetic_project(opts.synthetic)
+    print('input: %d bytes' % len(text))
+    for engine in opts.engines.split(','):
+        _, elapsed = timeit(noeval_parser.parser, text, disable_gc=True, engine=engine)
+        print('%-8s %8.3fs' % (engine, elapsed))
+    _, elapsed = timeit(feed, text, opts.chunk)
+    print('%-8s %8.3fs' % ('stream', elapsed))
+    _, elapsed = timeit(noeval_parser.parser, text, disable_gc=True, lazy=True)
+    print('%-8s %8.3fs' % ('lazy', elapsed))
+    proj, serial = timeit(noeval_parser.parser, text, disable_gc=True)
+    _, elapsed = timeit(adt.dump, proj, io.StringIO())
+    print('%-8s %8.3fs' % ('dump', elapsed))
+    data, elapsed = timeit(binfmt.dumps, proj)
+    print('%-8s %8.3fs (%d bytes)' % ('bdump', elapsed, len(data)))
+    _, elapsed = timeit(binfmt.loads, data)
+    print('%-8s %8.3fs (%.2fx speedup over token)' % ('bload', elapsed, serial / elapsed))
+    _, elapsed = timeit(noeval_parser.parallel_parser, text, opts.processes)
+    print('%-8s %8.3fs (%d processes, %.2fx speedup over token)' % (
+        'parallel', elapsed, opts.processes or cpu_count(), serial / elapsed))
+    if opts.memory:
+        for name, hashcons in (('memory', False), ('hashcons', True)):
+            mem = noeval_parser.memory_report(text, hashcons=hashcons)
+            print('%-8s %d objects, %.1f MB (unshared: %d objects, %.1f MB, saved %.0f%%)' % (
+                name, mem['objects'], mem['size'] / 1e6,
+                mem['unshared_objects'], mem['unshared_size'] / 1e6,
+                100 * (1 - mem['ratio'])))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+'''
+Benchmark for bap.adt.Visitor and bap.adt.Transformer
+
+Parses a project (an ADT dump or a synthetic one, see
+bench_noeval_parser.py) and reports the time each of the sample
+visitors took to traverse it, separately and fused in one traversal,
+and the time a sample transformer took to rewrite it. The visitors are
+both general (that visit every node) and targeted (that handle a single
+class each):
+
+    python benchmarks/bench_visitor.py FILE.adt
+    python benchmarks/bench_visitor.py --synthetic 2000
+'''
+import argparse
+
+from bap import adt, bil, noeval_parser
+from bench_noeval_parser import synthetic_project, timeit
+
+class CountVars(adt.Visitor):
+    '''counts variables'''
+    def __init__(self):
+        self.count = 0
+
+    def enter_Var(self, _):
+        self.count += 1
+
+class CountNodes(adt.Visitor):
+    '''counts all nodes'''
+    def __init__(self):
+        self.count = 0
+
+    def enter_ADT(self, _):
+        self.count += 1
+
+VISITORS = [CountVars, CountNodes]
+
+def counter(name):
+    '''
+    Return a visitor class, that counts nodes of the given class
+    '''
+    def enter(self, _):
+        self.count += 1
+    return type('Count' + name, (adt.Visitor,), {
+        '__init__': CountVars.__init__,
+        'enter_' + name: enter,
+    })
+
+# targeted visitors, each handles a different class
+TARGETED = [counter(name) for name in
+            ('Var', 'Int', 'PLUS', 'Def', 'Blk', 'Sub', 'Tid', 'Attr')]
+
+class Rename(adt.Transformer):
+    '''renames RSP to SP'''
+    def map_Var(self, var):
+        return bil.Var('SP', var.type) if var.name == 'RSP' else var
+
+def main(argv=None):
+    '''
+    Run the benchmark and print the report
+    '''
+    args = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    args.add_argument('input', nargs='?', help='ADT dump to parse')
+    args.add_argument('--synthetic', type=int, default=1000, metavar='N',
+                      help='number of subroutines in a synthetic project')
+    opts = args.parse_args(argv)
+    if opts.input:
+        with open(opts.input) as fobj:
+            text = fobj.read()
+    else:
+        text = synthetic_project(opts.synthetic)
+    proj = noeval_parser.parser(text, disable_gc=True)
+    for name, group in (('Fused', VISITORS), ('Targeted', TARGETED)):
+        total = 0
+        for cls in group:
+            visitor = cls()
+            _, elapsed = timeit(visitor.run, proj)
+            total += elapsed
+            print('%-12s %8.3fs (%d)' % (cls.__name__, elapsed, visitor.count))
+        fused = adt.Fused([cls() for cls in group])
+        _, elapsed = timeit(fused.run, proj)
+        print('%-12s %8.3fs (%.2fx speedup over separate runs)' % (name, elapsed, total / elapsed))
+    fused = adt.Fused([cls() for cls in VISITORS], timed=True)
+    fused.run(proj)
+    print(fused.report())
+    _, elapsed = timeit(Rename().run, proj)
+    print('%-12s %8.3fs' % ('Rename', elapsed))
+
+if __name__ == '__main__':
+    main()
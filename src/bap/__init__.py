@@ -138,7 +138,12 @@ following attributes:
 Where data is actual string of bytes.
 """
 
-from .bap import run
+from .bap import run, run_many
+
+try :
+    from .aio import run_async
+except (ImportError, SyntaxError):
+    pass
 
 try :
     from .rpc import disasm, image
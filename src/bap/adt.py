@@ -182,11 +182,23 @@ leading to fragile and hard to support programs.
 
 """
 
+import sys
+from timeit import default_timer
+from types import FunctionType
+
 try:
     from collections.abc import Iterable,Sequence,Mapping
 except ImportError:
     from collections import Iterable,Sequence,Mapping
 
+try:
+    _STRINGS = (str, unicode)
+    _INTEGERS = (int, long)
+except NameError:
+    _STRINGS = (str,)
+    _INTEGERS = (int,)
+_ATOMS = _STRINGS + _INTEGERS + (bytes, float)
+
 class ADT(object):
     """Algebraic Data Type.
 
@@ -195,17 +207,61 @@ class ADT(object):
     of ADT class, numbers, strings or lists. Empty set of arguments is
     permitted.  A one-tuple is automatically untupled, i.e., `Int(12)`
     has value `12`, not `(12,)`.  A name of the constructor is stored
-    in the `constr` field
+    in the `constr` field, that is derived from the class.
+
+    A structural comparison is provided. Two ADTs are equal if they
+    have the same constructor name and equal arguments, where lists
+    and other sequences (except tuples) are equal to each other, if
+    they have equal elements. The hash is computed from the structure
+    and is cached in the node, so an ADT must not be modified after it
+    was hashed (e.g., put into a set). Neither comparison nor hashing
+    recurse, so they work for arbitrary deep ADTs.
+
+    Instances have no `__dict__`, every subclass must define
+    `__slots__` (usually empty) to keep the representation compact.
+
+    A subclass may declare in `contains` the names of ADT classes
+    (looked up in the module of the subclass), whose instances or
+    instances of their subclasses may occur in the arguments. The
+    declaration lets visitors skip subtrees, that can't contain
+    anything they are interested in. The default `None` means that
+    anything may occur.
+    """
+    __slots__ = ('arg', '_hash')
 
-    A structural comparison is provided.
+    contains = None
 
-    """
     def __init__(self, *args):
-        self.constr = self.__class__.__name__
         self.arg = args if len(args) != 1 else args[0]
 
+    @property
+    def constr(self):
+        """a name of the constructor"""
+        return self.__class__.__name__
+
     def __cmp__(self,other):
-        return self.__dict__.__cmp__(other.__dict__)
+        return cmp((self.constr, self.arg), (other.constr, other.arg))
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, ADT):
+            return NotImplemented
+        return _equal(self, other)
+
+    def __ne__(self, other):
+        r = self.__eq__(other)
+        return r if r is NotImplemented else not r
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            return _hash(self)
+
+    def __reduce__(self):
+        args = self.arg if isinstance(self.arg, tuple) else (self.arg,)
+        return (self.__class__, args)
 
     def __repr__(self):
         def qstr(x):
@@ -215,6 +271,9 @@ class ADT(object):
                 return str(x)
             elif isinstance(x, tuple):
                 return "(" + ", ".join(qstr(i) for i in x) + ")"
+            elif isinstance(x, Sequence) and \
+                 not isinstance(x, (str, bytes, type(u''))):
+                return "[" + ", ".join(qstr(i) for i in x) + "]"
             else:
                 return '"{0}"'.format(x)
         def args():
@@ -226,6 +285,80 @@ class ADT(object):
         return "{0}({1})".format(self.constr, args())
 
 
+def _is_sequence(x):
+    """true if x is a non-tuple sequence, that may contain ADT"""
+    return isinstance(x, list) or \
+        not isinstance(x, _ATOMS) and not isinstance(x, tuple) and isinstance(x, Sequence)
+
+def _equal(x, y):
+    """structural equality of x and y"""
+    stack = [(x, y)]
+    while stack:
+        x, y = stack.pop()
+        if x is y:
+            continue
+        if isinstance(x, ADT):
+            if not isinstance(y, ADT) or \
+               x.__class__.__name__ != y.__class__.__name__:
+                return False
+            if x.__class__.__eq__ is not ADT.__eq__ or \
+               y.__class__.__eq__ is not ADT.__eq__:
+                if x != y:
+                    return False
+                continue
+            hx = getattr(x, '_hash', None)
+            if hx is not None:
+                hy = getattr(y, '_hash', None)
+                if hy is not None and hx != hy:
+                    return False
+            stack.append((x.arg, y.arg))
+        elif isinstance(x, tuple) or _is_sequence(x):
+            if isinstance(y, tuple) != isinstance(x, tuple) or \
+               not (isinstance(y, tuple) or _is_sequence(y)) or \
+               len(x) != len(y):
+                return False
+            stack.extend(zip(x, y))
+        elif isinstance(y, ADT) or x != y:
+            return False
+    return True
+
+def _hash(adt):
+    """computes and caches the structural hash of an ADT"""
+    # [node, items, index of the current item, hashes of the items]
+    stack = [[adt, _items(adt.arg), 0, []]]
+    while True:
+        frame = stack[-1]
+        value, items, i, hashes = frame
+        if i < len(items):
+            frame[2] = i + 1
+            x = items[i]
+            if isinstance(x, ADT):
+                h = getattr(x, '_hash', None)
+                if h is None:
+                    if x.__class__.__hash__ is ADT.__hash__:
+                        stack.append([x, _items(x.arg), 0, []])
+                        continue
+                    h = hash(x)
+            elif isinstance(x, tuple) or _is_sequence(x):
+                stack.append([x, x, 0, []])
+                continue
+            else:
+                h = hash(x)
+            hashes.append(h)
+            continue
+        stack.pop()
+        if isinstance(value, ADT):
+            h = value._hash = hash((value.__class__.__name__, tuple(hashes)))
+        else:
+            h = hash(tuple(hashes))
+        if not stack:
+            return h
+        stack[-1][3].append(h)
+
+def _items(arg):
+    return arg if isinstance(arg, tuple) else (arg,)
+
+
 class Visitor(object):
     """ADT Visitor.
     This class helps to perform iterations over arbitrary ADTs.
@@ -427,25 +560,216 @@ class Visitor(object):
     def run(self, adt):
         """visitor.run(adt) -> result
 
+        The handlers are resolved once for each pair of a visitor
+        class and an ADT class, and then are taken from the cache, so
+        handlers must be defined in the visitor class (or its bases)
+        before the first run. A handler set to None disables the
+        inherited one. Handlers assigned to the visitor instance are
+        honored too, but they are resolved anew on each run.
+
+        The traversal doesn't recurse, when the default `visit_ADT`,
+        `visit_Seq` and `visit_Map` methods are used, instead the path
+        to the current node is kept in an explicit stack, so that
+        arbitrary deep ADTs can be visited. Only overridden `visit`
+        methods recurse, by calling `run`.
+
+        Subtrees, that according to the `contains` declarations can't
+        have a node with a handler, are not visited at all.
         """
-        if isinstance(adt, ADT):
-
-            for meth in ("enter", "visit", "leave"):
-                for cls in adt.__class__.mro():
-                    name = "{0}_{1}".format(meth, cls.__name__)
-                    fn = getattr(self, name, None)
-                    if fn is not None:
-                        r = fn(adt)
-                        if r is not None:
-                            return r
-                        if meth == "visit":
-                            break
+        vcls = self.__class__
+        owner, dispatch, pruned = _resolver(self)
+        if not isinstance(adt, ADT) or adt.__class__ in pruned:
+            return None
+        stack = [] # (node, leave handlers, children, any result stops)
+        node = adt
+        while True:
+            enters, visit, leaves = dispatch.get((vcls, node.__class__)) or \
+                                    _handlers(vcls, node.__class__, owner, dispatch)
+            r = None
+            children = None
+            for fn in enters:
+                r = fn(self, node)
+                if r is not None:
+                    break
+            else:
+                if visit is _visit_adt:
+                    arg = node.arg
+                    if isinstance(arg, tuple):
+                        children, every = iter(arg), False
+                    elif isinstance(arg, ADT):
+                        children, every = iter((arg,)), True
+                elif visit is _visit_seq or visit is _visit_map:
+                    children, every = iter(node.arg[0]), False
+                else:
+                    r = visit(self, node)
+                if children is None and r is None:
+                    r = _leave(self, leaves, node)
+            if children is not None:
+                stack.append((node, leaves, children, every))
+            while stack:
+                node, leaves, children, every = stack[-1]
+                if r is not None and (every or r):
+                    # the visit method of the parent returns r
+                    stack.pop()
+                    continue
+                for child in children:
+                    if isinstance(child, ADT) and child.__class__ not in pruned:
+                        break
+                else:
+                    stack.pop()
+                    r = _leave(self, leaves, node)
+                    continue
+                node = child
+                break
+            else:
+                return r
+
+
+def _leave(visitor, leaves, adt):
+    for fn in leaves:
+        r = fn(visitor, adt)
+        if r is not None:
+            return r
+    return None
+
+# (visitor class, ADT class) -> (enter handlers, visit handler, leave handlers)
+_dispatch = {}
+
+def _method(vcls, name):
+    """looks up a method name in a visitor class.
+
+    Returns a function, that should be called with the visitor
+    instance as the first argument, or None if there is no such
+    method.
+    """
+    for cls in vcls.__mro__:
+        if name in cls.__dict__:
+            fn = cls.__dict__[name]
+            if fn is None: # disables the inherited method
+                return None
+            if isinstance(fn, FunctionType):
+                return fn
+            return lambda self, adt: getattr(self, name)(adt)
+    return None
+
+def _own_method(visitor, name):
+    """looks up a handler assigned to the visitor instance"""
+    fn = visitor.__dict__[name]
+    if fn is None:
+        return None
+    return lambda self, adt: fn(adt)
+
+def _handlers(vcls, acls, visitor=None, dispatch=_dispatch):
+    """computes the handlers of the visitor class for the ADT class.
+
+    All `enter_C` methods, the first `visit_C` method, and all
+    `leave_C` methods, where `C` goes through the MRO of the ADT
+    class. If the visitor instance is passed, then its own attributes
+    take precedence over the methods. The handlers are stored in the
+    dispatch table.
+    """
+    def methods(meth):
+        for cls in acls.mro():
+            name = "{0}_{1}".format(meth, cls.__name__)
+            if visitor is not None and name in visitor.__dict__:
+                fn = _own_method(visitor, name)
+            else:
+                fn = _method(vcls, name)
+            if fn is not None:
+                yield fn
+    handlers = (list(methods("enter")),
+                next(methods("visit"), None),
+                list(methods("leave")))
+    dispatch[(vcls, acls)] = handlers
+    return handlers
+
+def _subclasses(cls):
+    """returns a set of a class and all its subclasses"""
+    result = set()
+    stack = [cls]
+    while stack:
+        cls = stack.pop()
+        if cls not in result:
+            result.add(cls)
+            stack.extend(cls.__subclasses__())
+    return result
+
+def _has_handlers(vcls, acls):
+    enters, visit, leaves = _dispatch.get((vcls, acls)) or _handlers(vcls, acls)
+    return enters or leaves or visit not in (_visit_adt, _visit_seq, _visit_map)
+
+# visitor class -> a set of ADT classes, that needn't be visited
+_pruned = {}
+
+def _prune(vcls, has_handlers=_has_handlers):
+    """computes the ADT classes, that the visitor class may skip.
+
+    A class is skipped, if it has no handlers, and all classes, that
+    it may contain, are also skipped. The ADT classes are taken as
+    they are when the visitor runs for the first time.
+    """
+    classes = _subclasses(ADT)
+    useful = set()
+    contains = {}
+    for cls in classes:
+        if cls.contains is None or has_handlers(vcls, cls):
+            useful.add(cls)
+        else:
+            module = sys.modules[cls.__module__]
+            contains[cls] = set()
+            for name in cls.contains:
+                contains[cls] |= _subclasses(getattr(module, name))
+    changed = True
+    while changed:
+        changed = False
+        for cls in classes - useful:
+            if not contains[cls].isdisjoint(useful):
+                useful.add(cls)
+                changed = True
+    pruned = frozenset(classes - useful)
+    _pruned[vcls] = pruned
+    return pruned
+
+_PREFIXES = ('enter_', 'visit_', 'leave_')
+
+def _resolver(visitor):
+    """returns (owner, dispatch, pruned) for a run of the visitor.
+
+    Normally the handlers and the pruned classes are cached per
+    visitor class, and the owner is None. If handlers are assigned to
+    the visitor instance, then it is the owner, the dispatch table is
+    fresh and nothing is pruned.
+    """
+    own = getattr(visitor, '__dict__', ())
+    if any(name.startswith(_PREFIXES) for name in own):
+        return visitor, {}, frozenset()
+    vcls = visitor.__class__
+    pruned = _pruned.get(vcls)
+    if pruned is None:
+        pruned = _prune(vcls)
+    return None, _dispatch, pruned
+
+# default visit methods, that are run without recursion
+_visit_adt = Visitor.__dict__['visit_ADT']
+_visit_seq = Visitor.__dict__['visit_Seq']
+_visit_map = Visitor.__dict__['visit_Map']
+_visit_defaults = (_visit_adt, _visit_seq, _visit_map)
 
 class Seq(ADT,Sequence) :
+    """Seq(elements) a sequence of elements.
+
+    The elements are stored only once, in the `elements` field, and
+    `arg` is computed on demand.
+    """
+    __slots__ = ('elements',)
+
     def __init__(self, *args) :
-        super(Seq,self).__init__(args)
         self.elements = args[0]
 
+    @property
+    def arg(self):
+        return (self.elements,)
+
     def __getitem__(self,i) :
         return self.elements.__getitem__(i)
 
@@ -507,18 +831,509 @@ class Seq(ADT,Sequence) :
 
 
 class Map(ADT,Mapping) :
+    """Map(pairs) a mapping built from a list of key-value pairs.
+
+    The list of pairs is the only backing store, and a key is looked
+    up with a linear scan from the end of it, as the lists are usually
+    short. The pairs with duplicate keys are all kept in the list (so
+    `arg` is the same as it was passed), while the last of them wins
+    in the lookup. If a subclass defines the `pair` constructor, then
+    only the (key, value) tuples are kept, and the pair objects in
+    `arg` are rebuilt on demand.
+    """
+    __slots__ = ()
+
+    pair = None
+
     def __init__(self, *args) :
-        super(Map,self).__init__(args)
-        self.elements = dict((x.arg[0],x.arg[1]) for x in args[0])
+        if self.pair is not None:
+            args = ([x.arg for x in args[0]],)
+        ADT.arg.__set__(self, args)
+
+    @property
+    def arg(self):
+        arg = ADT.arg.__get__(self, ADT)
+        if self.pair is None:
+            return arg
+        return ([self.pair(k, v) for k, v in arg[0]],)
+
+    @property
+    def elements(self):
+        "a new dictionary from keys to values"
+        return dict(self._pairs())
+
+    def _pairs(self):
+        """returns the list of (key, value) tuples"""
+        pairs = ADT.arg.__get__(self, ADT)[0]
+        if self.pair is not None:
+            return pairs
+        return [(x.arg[0], x.arg[1]) for x in pairs]
 
     def __getitem__(self,i) :
-        return self.elements.__getitem__(i)
+        for key, value in reversed(self._pairs()):
+            if key == i:
+                return value
+        raise KeyError(i)
 
     def __len__(self) :
-        return self.elements.__len__()
+        return len(set(key for key, _ in self._pairs()))
 
     def __iter__(self) :
-        return self.elements.__iter__()
+        return _unique(key for key, _ in self._pairs())
+
+    def __eq__(self, other):
+        return _mapping_equal(self, other)
+
+    def __hash__(self):
+        return _mapping_hash(self)
+
+
+def _mapping_equal(x, y):
+    """a mapping is equal to any mapping with the same items,
+    regardless of their order and of its type"""
+    if not isinstance(y, Mapping):
+        return NotImplemented
+    return dict(x.items()) == dict(y.items())
+
+def _mapping_hash(x):
+    """an order independent hash of the items, cached the same as
+    the structural hash"""
+    try:
+        return x._hash
+    except AttributeError:
+        x._hash = hash(frozenset(x.items()))
+        return x._hash
+
+def _unique(keys):
+    """yields the keys in the order of their first occurrence"""
+    seen = set()
+    for key in keys:
+        if key not in seen:
+            seen.add(key)
+            yield key
+
+
+class Fused(object):
+    """Fused(visitors, timed=False) runs several visitors at once.
+
+    The visitors are run in a single traversal of an ADT, that
+    dispatches each node to the `enter`, `visit` and `leave` handlers
+    of every visitor, in the order of the `visitors` list. The result
+    is the same, as if the visitors were run one after another. Each
+    visitor is short-circuited and prunes subtrees on its own, and a
+    subtree is skipped only when it is pruned by all visitors. A
+    visitor with an overridden `visit_C` method traverses the `C`
+    subtree by itself.
+
+    If `timed` is true, then the time spent in the handlers of each
+    visitor is accumulated in the `timings` list.
+
+    Example
+    -------
+
+    >>> fused = Fused([CountNegatives(), Sign()], timed=True)
+    >>> count, sign = fused.run(exp)
+    >>> print(fused.report())
+    """
+
+    def __init__(self, visitors, timed=False):
+        self.visitors = list(visitors)
+        self.timed = timed
+        self.timings = [0.0] * len(self.visitors)
+
+    def run(self, adt):
+        """fused.run(adt) -> [result]
+
+        Returns a list with the result of each visitor.
+        """
+        visitors = self.visitors
+        timed = self.timed
+        timings = self.timings
+        results = [None] * len(visitors)
+        classes = [v.__class__ for v in visitors]
+        owners, dispatches, pruned = [], [], []
+        for visitor in visitors:
+            owner, dispatch, skipped = _resolver(visitor)
+            owners.append(owner)
+            dispatches.append(dispatch)
+            pruned.append(skipped)
+        # visitors active in the parent -> ADT class -> plan of a node
+        plans = {}
+
+        def table(parent):
+            kids = plans.get(parent)
+            if kids is None:
+                kids = plans[parent] = {}
+            return kids
+
+        def plan(cls, parent):
+            # a plan is a tuple of
+            # - active: the visitors, that do not prune the node;
+            # - calls: (i, visitor, enters, visit, leaves) of the active
+            #   visitors, that have enter handlers or their own visit method;
+            # - default: the default visit method of the passive visitors;
+            # - leaving: (i, visitor, leaves) of the visitors with leaves;
+            # - kids: the table of plans of the children.
+            active = tuple(i for i in parent if cls not in pruned[i])
+            calls, leaving = [], []
+            default = None
+            for i in active:
+                enters, visit, leaves = dispatches[i].get((classes[i], cls)) or \
+                                        _handlers(classes[i], cls, owners[i], dispatches[i])
+                if default is None and not enters and visit in _visit_defaults:
+                    default = visit
+                if enters or visit is not default:
+                    calls.append((i, visitors[i], enters, visit, leaves))
+                if leaves:
+                    leaving.append((i, visitors[i], leaves))
+            result = active, tuple(calls), default, tuple(leaving), table(active)
+            table(parent)[cls] = result
+            return result
+
+        # frames are [node, children, any result stops, active visitors,
+        #             leaving, plans of children]
+        stack = []
+
+        def stop(i, r):
+            # the visitor i has result r for the node above the stack
+            for frame in reversed(stack):
+                if not (frame[2] or r):
+                    return
+                frame[3] = tuple(j for j in frame[3] if j != i)
+                frame[5] = table(frame[3])
+            results[i] = r
+
+        if not isinstance(adt, ADT):
+            return results
+        node = adt
+        everyone = tuple(range(len(visitors)))
+        active, calls, default, leaving, kids = plan(adt.__class__, everyone)
+        while True:
+            descend = active
+            if calls:
+                skip = [] # visitors, that do not descend
+                for i, visitor, enters, visit, leaves in calls:
+                    if timed:
+                        started = default_timer()
+                    r = None
+                    for fn in enters:
+                        r = fn(visitor, node)
+                        if r is not None:
+                            skip.append(i)
+                            break
+                    else:
+                        if default is None and visit in _visit_defaults:
+                            default = visit
+                        if visit is not default:
+                            skip.append(i)
+                            r = visit(visitor, node)
+                            if r is None and leaves:
+                                r = _leave(visitor, leaves, node)
+                    if timed:
+                        timings[i] += default_timer() - started
+                    if r is not None:
+                        stop(i, r)
+                if skip:
+                    descend = tuple(i for i in active if i not in skip)
+                    kids = table(descend)
+            if descend:
+                children, every = iter(()), False
+                if default is _visit_adt:
+                    arg = node.arg
+                    if isinstance(arg, tuple):
+                        children = iter(arg)
+                    elif isinstance(arg, ADT):
+                        children, every = iter((arg,)), True
+                else:
+                    children = iter(node.arg[0])
+                stack.append([node, children, every, descend, leaving, kids])
+            while stack:
+                frame = stack[-1]
+                node, children, _, active, leaving, kids = frame
+                if active:
+                    for child in children:
+                        if isinstance(child, ADT):
+                            child_plan = kids.get(child.__class__) or \
+                                         plan(child.__class__, active)
+                            if child_plan[0]:
+                                break
+                    else:
+                        child = None
+                    if child is not None:
+                        node = child
+                        active, calls, default, leaving, kids = child_plan
+                        break
+                stack.pop()
+                for i, visitor, leaves in leaving:
+                    if i in frame[3]:
+                        if timed:
+                            started = default_timer()
+                        r = _leave(visitor, leaves, node)
+                        if timed:
+                            timings[i] += default_timer() - started
+                        if r is not None:
+                            stop(i, r)
+            else:
+                return results
+
+    def report(self):
+        """fused.report() -> str
+
+        Returns a table of the time spent by each visitor.
+        """
+        return "\n".join("{0:<24} {1:10.3f}s".format(v.__class__.__name__, t)
+                         for v, t in zip(self.visitors, self.timings))
+
+
+class Transformer(object):
+    """ADT Transformer.
+
+    A transformer rewrites an ADT into a new one, e.g., renames
+    variables or simplifies expressions. It is a counterpart of the
+    Visitor, that instead of the `enter`, `visit` and `leave` methods
+    has a single kind of methods named `map_C`, where `C` is a name of
+    an ADT class. When a transformer runs, it finds the first method
+    `map_C` for each class `C` in the MRO of a visited instance and
+    calls it with the instance, whose arguments are already
+    transformed (i.e., in the postorder). The method should return a
+    replacement, or the instance itself, if it shouldn't be changed.
+
+    The arguments of an ADT are traversed together with tuples, lists
+    and other sequences (except strings) inside them, but not other
+    containers. A changed sequence, other than a tuple, is rebuilt as
+    a list.
+
+    The result shares all unchanged subtrees with the original, so
+    only the nodes on the paths from the root to the replaced nodes
+    are allocated. Subtrees, that can't contain an instance with a
+    `map` method (see `ADT.contains`), are not traversed at all.
+
+    Example
+    -------
+
+    >>> class Rename(Transformer):
+            def __init__(self, names):
+                self.names = names
+
+            def map_Var(self, var):
+                name = self.names.get(var.name)
+                return var if name is None else Var(name, var.type)
+
+    >>> sub = Rename({'RSP': 'SP'}).run(sub)
+    """
+
+    def run(self, adt):
+        """transformer.run(adt) -> result
+
+        Returns the transformed ADT, or the same ADT, if nothing was
+        changed.
+        """
+        tcls = self.__class__
+        pruned = _pruned.get(tcls)
+        if pruned is None:
+            pruned = _prune(tcls, _has_mapper)
+        stack = [] # [value, items, index of the current item, new items]
+        value = adt
+        while True:
+            items = None
+            if isinstance(value, ADT):
+                if value.__class__ not in pruned:
+                    arg = value.arg
+                    items = arg if isinstance(arg, tuple) else (arg,)
+            elif isinstance(value, (tuple, list)) or \
+                 not isinstance(value, _ATOMS) and isinstance(value, Sequence):
+                items = value
+            if items:
+                stack.append([value, items, 0, None])
+                value = items[0]
+                continue
+            result = value
+            if items is not None and isinstance(value, ADT):
+                result = _map(self, value)
+            while stack:
+                frame = stack[-1]
+                value, items, i, new = frame
+                if new is None and result is not items[i]:
+                    new = frame[3] = list(items[:i])
+                if new is not None:
+                    new.append(result)
+                i += 1
+                if i < len(items):
+                    frame[2] = i
+                    value = items[i]
+                    break
+                stack.pop()
+                if isinstance(value, ADT):
+                    result = _map(self, value if new is None else value.__class__(*new))
+                elif new is None:
+                    result = value
+                else:
+                    result = tuple(new) if isinstance(value, tuple) else new
+            else:
+                return result
+
+
+def _map(transformer, adt):
+    """applies the map method of the transformer to the ADT"""
+    fn = _mappers.get((transformer.__class__, adt.__class__), _missing)
+    if fn is _missing:
+        fn = _mapper(transformer.__class__, adt.__class__)
+    return adt if fn is None else fn(transformer, adt)
+
+_missing = object()
+
+# (transformer class, ADT class) -> map method or None
+_mappers = {}
+
+def _mapper(tcls, acls):
+    """finds the first `map_C` method for `C` in the MRO of the ADT class"""
+    fn = None
+    for cls in acls.mro():
+        fn = _method(tcls, "map_{0}".format(cls.__name__))
+        if fn is not None:
+            break
+    _mappers[(tcls, acls)] = fn
+    return fn
+
+def _has_mapper(tcls, acls):
+    fn = _mappers.get((tcls, acls), _missing)
+    if fn is _missing:
+        fn = _mapper(tcls, acls)
+    return fn is not None
+
+
+def walk(adt, types=None, predicate=None, path=False):
+    """walk(adt[, types[, predicate[, path]]]) -> iterator
+
+    Lazily yields nodes of the ADT in the preorder, that are instances
+    of `types` (a class or a tuple of classes, any ADT by default) and
+    satisfy the `predicate` (if specified). If `path` is true, then
+    pairs `(node, parents)` are yielded instead, where `parents` is a
+    tuple of the ADT nodes on the path from the root to the node.
+
+    The arguments of an ADT are traversed together with all sequences
+    inside them, except strings. The traversal doesn't recurse, and
+    subtrees, that can't contain an instance of `types` (see
+    `ADT.contains`) are skipped. Nothing is computed in advance, so
+    it is cheap to stop, once the needed node is found.
+
+    Example
+    -------
+
+    >>> stores = walk(sub, bil.Store)
+    >>> first = next(stores, None)
+    >>> rsp = walk(sub, bil.Var, lambda v: v.name == 'RSP', path=True)
+    >>> defs = set(p[-1] for v, p in rsp if isinstance(p[-1], bir.Def))
+    """
+    if types is None:
+        types = ADT
+    if not isinstance(types, tuple):
+        types = (types,)
+    key = (walk,) + types
+    pruned = _pruned.get(key)
+    if pruned is None:
+        pruned = _prune(key, lambda _, cls: issubclass(cls, types))
+    parents = []
+    stack = [(iter((adt,)), False)] # (items, items are arguments of a parent)
+    while stack:
+        items, parent = stack[-1]
+        for value in items:
+            if isinstance(value, ADT):
+                if value.__class__ in pruned:
+                    continue
+                if isinstance(value, types) and (predicate is None or predicate(value)):
+                    yield (value, tuple(parents)) if path else value
+                arg = value.arg
+                parents.append(value)
+                stack.append((iter(arg if isinstance(arg, tuple) else (arg,)), True))
+                break
+            elif isinstance(value, (tuple, list)) or \
+                 not isinstance(value, _ATOMS) and isinstance(value, Sequence):
+                stack.append((iter(value), False))
+                break
+        else:
+            stack.pop()
+            if parent:
+                parents.pop()
+
+
+def dump(adt, fileobj, bufsize=1 << 16):
+    """dump(adt, fileobj[, bufsize]) writes the ADT to a text file.
+
+    The ADT is written in the same syntax, that `repr` uses, but
+    strings are escaped and lists and other sequences (except tuples)
+    are written as lists, so that the output can be read back with
+    `noeval_parser.parser` (or `bir.loads`). The output is written in
+    chunks of about `bufsize` characters without recursion, so neither
+    the size nor the depth of the ADT is limited.
+
+    Example
+    -------
+
+    >>> with open('main.adt', 'w') as out:
+            dump(proj.program.subs.find('main'), out)
+    """
+    out = []
+    size = 0
+    stack = [[(adt,), 0, '']] # [items, index of the next item, closing bracket]
+    while stack:
+        frame = stack[-1]
+        items, i, close = frame
+        if i == len(items):
+            stack.pop()
+            out.append(close)
+            size += 1
+            continue
+        frame[1] = i + 1
+        x = items[i]
+        if isinstance(x, ADT):
+            arg = x.arg
+            s = x.__class__.__name__ + '('
+            stack.append([arg if isinstance(arg, tuple) else (arg,), 0, ')'])
+        elif isinstance(x, tuple):
+            s = '('
+            stack.append([x, 0, ')'])
+        elif isinstance(x, _STRINGS):
+            s = '"' + _escape(x) + '"'
+        elif isinstance(x, _INTEGERS) and not isinstance(x, bool):
+            if x < 0:
+                raise ValueError("can't dump a negative integer {0}".format(x))
+            s = '0x{0:x}'.format(x)
+        elif isinstance(x, list) or isinstance(x, Sequence):
+            s = '['
+            stack.append([x, 0, ']'])
+        else:
+            raise TypeError("can't dump {0!r}".format(x))
+        if i:
+            s = ', ' + s
+        out.append(s)
+        size += len(s)
+        if size > bufsize:
+            fileobj.write(''.join(out))
+            del out[:]
+            size = 0
+    fileobj.write(''.join(out))
+
+def dumps(adt):
+    """dumps(adt) -> str
+
+    Returns the ADT text as written by `dump`.
+    """
+    chunks = _Chunks()
+    dump(adt, chunks)
+    return ''.join(chunks)
+
+class _Chunks(list):
+    write = list.append
+
+if sys.version_info > (3,):
+    def _escape(s):
+        return s.encode('unicode_escape').decode('ascii').replace('"', '\\"')
+else:
+    def _escape(s):
+        if isinstance(s, unicode):
+            s = s.encode('utf-8')
+        return s.encode('string_escape').replace('"', '\\"')
 
 
 def visit(visitor, adt):
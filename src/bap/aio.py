@@ -0,0 +1,207 @@
+"""asyncio interface to bap.
+
+>>> proj = await bap.run_async('/bin/true')
+
+The module requires Python 3.5 or newer.
+"""
+
+import asyncio
+import os
+import tempfile
+from asyncio.subprocess import PIPE
+from concurrent.futures import ProcessPoolExecutor
+
+from . import binfmt
+from .adt import ADT
+from .bap import adt_project_parser, CHUNK_SIZE, MalformedOutput, Killed, Failed, Timeout
+from .bap import _Limits, _load_file
+
+try:
+    _get_loop = asyncio.get_running_loop
+except AttributeError: # python < 3.7
+    _get_loop = asyncio.get_event_loop
+
+
+async def run_async(path, args=[], bap='bap', parser=adt_project_parser,
+                    timeout=None, executor=None, semaphore=None,
+                    memory_limit=None):
+    r"""run_async(file[, args] [, bap=PATH] [,parser=PARSER]
+                 [,timeout=SECONDS] [,executor=EXECUTOR]
+                 [,semaphore=SEMAPHORE] [,memory_limit=BYTES]) -> project
+
+    A coroutine, that runs bap on the `file` in an asyncio subprocess
+    and returns the parsed output. The arguments, the parser and the
+    exceptions are the same as of `bap.run`. In particular, a list of
+    parsers with distinct formats dumps each format into a temporary
+    file, and a dictionary of the results keyed by the format is
+    returned.
+
+    The output is read as it is produced. If `executor` is not
+    specified, then it is parsed incrementally in the event loop (if
+    the parser has the `incremental` function), otherwise it is
+    collected and parsed with the `load` function in the executor.
+    A `concurrent.futures.ProcessPoolExecutor` moves parsing out of
+    the process, so it doesn't hold the GIL of the event loop, in that
+    case the `load` function must be picklable.
+
+    >>> with ProcessPoolExecutor() as pool:
+    ...     proj = await run_async('/bin/true', executor=pool)
+
+    If the call is cancelled, or doesn't complete in `timeout` seconds,
+    then bap is killed and waited for. In the latter case the Timeout
+    exception is raised, the same as by `bap.run`, with the standard
+    error, that bap has printed so far. The `memory_limit` is the same
+    as of `bap.run`.
+
+    The number of bap instances running at once can be bounded by
+    passing the same `asyncio.Semaphore` to all calls:
+
+    >>> limit = asyncio.Semaphore(4)
+    >>> projs = await asyncio.gather(*[
+    ...     run_async(path, semaphore=limit) for path in paths])
+    """
+    limits = _Limits(None, memory_limit)
+    if semaphore is None:
+        return await _run(path, args, bap, parser, timeout, executor, limits)
+    async with semaphore:
+        return await _run(path, args, bap, parser, timeout, executor, limits)
+
+
+async def _run(path, args, bap, parser, timeout, executor, limits):
+    opts = [bap, path] + list(args)
+    if isinstance(parser, (list, tuple)):
+        formats = [p.get('format') for p in parser]
+        if None in formats or len(set(formats)) != len(formats):
+            raise ValueError('each parser must have a distinct format')
+        names = []
+        try:
+            for fmt in formats:
+                fd, name = tempfile.mkstemp(prefix='bap-', suffix='.' + fmt)
+                os.close(fd)
+                names.append(name)
+                opts.append('-d{0}:{1}'.format(fmt, name))
+            results = await _spawn(opts, timeout, limits, lambda proc, errors: _load_files(
+                proc, opts, names, parser, executor, limits, errors))
+            return dict(zip(formats, results))
+        finally:
+            for name in names:
+                if os.path.exists(name):
+                    os.remove(name)
+    if parser and 'format' in parser:
+        opts += ['-d{format}'.format(**parser)]
+    return await _spawn(opts, timeout, limits, lambda proc, errors: _communicate(
+        proc, opts, parser, executor, limits, errors))
+
+
+async def _spawn(opts, timeout, limits, communicate):
+    """runs bap and awaits communicate(proc, errors), where errors is
+    a future of the standard error, in the timeout"""
+    proc = await asyncio.create_subprocess_exec(
+        *opts, stdout=PIPE, stderr=PIPE, preexec_fn=limits.preexec())
+    errors = asyncio.ensure_future(proc.stderr.read())
+    try:
+        return await asyncio.wait_for(communicate(proc, errors), timeout)
+    except asyncio.TimeoutError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        try: # the pipe is closed, unless bap has left children
+            err = await asyncio.wait_for(asyncio.shield(errors), 1)
+        except asyncio.TimeoutError:
+            err = b''
+        raise Timeout(timeout, opts, None, err)
+    finally:
+        errors.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+async def _communicate(proc, opts, parser, executor, limits, errors):
+    """reads the output of bap while it is running and parses it"""
+    loader = None
+    if executor is None and parser and 'incremental' in parser:
+        loader = parser['incremental']()
+    chunks = []
+    failure = None
+    while True:
+        chunk = await proc.stdout.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if loader is None:
+            chunks.append(chunk)
+        elif failure is None:
+            try:
+                loader.feed(chunk)
+            except Exception as exn:
+                failure = exn # report it only if bap has succeeded
+    await proc.wait()
+    err = await asyncio.shield(errors)
+
+    out = None if loader else b''.join(chunks)
+
+    _check(proc, opts, out, err, limits)
+    try:
+        if failure is not None:
+            raise failure
+        if loader is not None:
+            return loader.close()
+        elif parser and 'load' in parser:
+            if executor is None:
+                return parser['load'](out)
+            return await _in_executor(executor, _load, parser['load'], out)
+        else:
+            return out
+    except SyntaxError as exn:
+        raise MalformedOutput(exn, opts, out, err)
+
+
+async def _load_files(proc, opts, names, parsers, executor, limits, errors):
+    """waits for bap and parses the files, that it has dumped"""
+    while await proc.stdout.read(CHUNK_SIZE):
+        pass
+    await proc.wait()
+    err = await asyncio.shield(errors)
+    _check(proc, opts, None, err, limits)
+    results = []
+    for name, parser in zip(names, parsers):
+        try:
+            if executor is None:
+                results.append(_load_file(name, parser))
+            else:
+                results.append(await _in_executor(executor, _load_path, name, parser))
+        except SyntaxError as exn:
+            raise MalformedOutput(exn, opts, None, err)
+        os.remove(name) # release the disk space early
+    return results
+
+
+def _check(proc, opts, out, err, limits):
+    """raises an exception, if bap has not succeeded"""
+    limits.check(proc, opts, out, err)
+    if proc.returncode < 0:
+        raise Killed(-proc.returncode, opts, out, err)
+    elif proc.returncode > 0:
+        raise Failed(proc.returncode, opts, out, err)
+
+
+async def _in_executor(executor, load, *args):
+    """runs the load function in the executor, a project is passed back
+    from another process in the binary format"""
+    pack = isinstance(executor, ProcessPoolExecutor)
+    packed, result = await _get_loop().run_in_executor(executor, load, pack, *args)
+    return binfmt.loads(result) if packed else result
+
+
+def _load(pack, load, out):
+    """parses the output in an executor"""
+    return _pack(pack, load(out))
+
+def _load_path(pack, name, parser):
+    """parses a file in an executor"""
+    return _pack(pack, _load_file(name, parser))
+
+def _pack(pack, result):
+    if pack and isinstance(result, ADT):
+        return True, binfmt.dumps(result)
+    return False, result
@@ -6,239 +6,239 @@ from .adt import *
 from .asm import *
 from .bil import *
 
-class Reg(ADT) : pass
-class Nil(Reg) : pass
-class GPR(Reg) : pass
-class CCR(Reg) : pass
+class Reg(ADT) : __slots__ = ()
+class Nil(Reg) : __slots__ = ()
+class GPR(Reg) : __slots__ = ()
+class CCR(Reg) : __slots__ = ()
 
-class R0(GPR) : pass
-class R1(GPR) : pass
-class R2(GPR) : pass
-class R3(GPR) : pass
-class R4(GPR) : pass
-class R5(GPR) : pass
-class R6(GPR) : pass
-class R7(GPR) : pass
-class R8(GPR) : pass
-class R9(GPR) : pass
-class R10(GPR) : pass
-class R11(GPR) : pass
-class R12(GPR) : pass
-class LR(GPR) : pass
-class PC(GPR) : pass
-class SP(GPR) : pass
+class R0(GPR) : __slots__ = ()
+class R1(GPR) : __slots__ = ()
+class R2(GPR) : __slots__ = ()
+class R3(GPR) : __slots__ = ()
+class R4(GPR) : __slots__ = ()
+class R5(GPR) : __slots__ = ()
+class R6(GPR) : __slots__ = ()
+class R7(GPR) : __slots__ = ()
+class R8(GPR) : __slots__ = ()
+class R9(GPR) : __slots__ = ()
+class R10(GPR) : __slots__ = ()
+class R11(GPR) : __slots__ = ()
+class R12(GPR) : __slots__ = ()
+class LR(GPR) : __slots__ = ()
+class PC(GPR) : __slots__ = ()
+class SP(GPR) : __slots__ = ()
 
-class CPSR(CCR) : pass
-class SPSR(CCR) : pass
-class ITSTATE(CCR) : pass
+class CPSR(CCR) : __slots__ = ()
+class SPSR(CCR) : __slots__ = ()
+class ITSTATE(CCR) : __slots__ = ()
 
-class Insn(ADT)     : pass
-class Move(Insn)    : pass
-class Bits(Insn)    : pass
-class Mult(Insn)    : pass
-class Mem(Insn)     : pass
-class Branch(Insn)  : pass
-class Special(Insn) : pass
+class Insn(ADT)     : __slots__ = ()
+class Move(Insn)    : __slots__ = ()
+class Bits(Insn)    : __slots__ = ()
+class Mult(Insn)    : __slots__ = ()
+class Mem(Insn)     : __slots__ = ()
+class Branch(Insn)  : __slots__ = ()
+class Special(Insn) : __slots__ = ()
 
-class ADCri(Move) : pass
-class ADCrr(Move) : pass
-class ADCrsi(Move) : pass
-class ADCrsr(Move) : pass
-class ADDri(Move) : pass
-class ADDrr(Move) : pass
-class ADDrsi(Move) : pass
-class ADDrsr(Move) : pass
-class ANDri(Move) : pass
-class ANDrr(Move) : pass
-class ANDrsi(Move) : pass
-class ANDrsr(Move) : pass
-class BICri(Move) : pass
-class BICrr(Move) : pass
-class BICrsi(Move) : pass
-class BICrsr(Move) : pass
-class CMNri(Move) : pass
-class CMNzrr(Move) : pass
-class CMNzrsi(Move) : pass
-class CMNzrsr(Move) : pass
-class CMPri(Move) : pass
-class CMPrr(Move) : pass
-class CMPrsi(Move) : pass
-class CMPrsr(Move) : pass
-class EORri(Move) : pass
-class EORrr(Move) : pass
-class EORrsi(Move) : pass
-class EORrsr(Move) : pass
-class MOVTi16(Move) : pass
-class MOVi(Move) : pass
-class MOVi16(Move) : pass
-class MOVr(Move) : pass
-class MOVsi(Move) : pass
-class MOVsr(Move) : pass
-class MOVPCLR(Move) : pass
-class MVNi(Move) : pass
-class MVNr(Move) : pass
-class MVNsi(Move) : pass
-class MVNsr(Move) : pass
-class ORRri(Move) : pass
-class ORRrr(Move) : pass
-class ORRrsi(Move) : pass
-class ORRrsr(Move) : pass
-class RSBri(Move) : pass
-class RSBrr(Move) : pass
-class RSBrsi(Move) : pass
-class RSBrsr(Move) : pass
-class RSCri(Move) : pass
-class RSCrr(Move) : pass
-class RSCrsi(Move) : pass
-class RSCrsr(Move) : pass
-class SBCri(Move) : pass
-class SBCrr(Move) : pass
-class SBCrsi(Move) : pass
-class SBCrsr(Move) : pass
-class SUBri(Move) : pass
-class SUBrr(Move) : pass
-class SUBrsi(Move) : pass
-class SUBrsr(Move) : pass
-class TEQri(Move) : pass
-class TEQrr(Move) : pass
-class TEQrsi(Move) : pass
-class TEQrsr(Move) : pass
-class TSTri(Move) : pass
-class TSTrr(Move) : pass
-class TSTrsi(Move) : pass
-class TSTrsr(Move) : pass
+class ADCri(Move) : __slots__ = ()
+class ADCrr(Move) : __slots__ = ()
+class ADCrsi(Move) : __slots__ = ()
+class ADCrsr(Move) : __slots__ = ()
+class ADDri(Move) : __slots__ = ()
+class ADDrr(Move) : __slots__ = ()
+class ADDrsi(Move) : __slots__ = ()
+class ADDrsr(Move) : __slots__ = ()
+class ANDri(Move) : __slots__ = ()
+class ANDrr(Move) : __slots__ = ()
+class ANDrsi(Move) : __slots__ = ()
+class ANDrsr(Move) : __slots__ = ()
+class BICri(Move) : __slots__ = ()
+class BICrr(Move) : __slots__ = ()
+class BICrsi(Move) : __slots__ = ()
+class BICrsr(Move) : __slots__ = ()
+class CMNri(Move) : __slots__ = ()
+class CMNzrr(Move) : __slots__ = ()
+class CMNzrsi(Move) : __slots__ = ()
+class CMNzrsr(Move) : __slots__ = ()
+class CMPri(Move) : __slots__ = ()
+class CMPrr(Move) : __slots__ = ()
+class CMPrsi(Move) : __slots__ = ()
+class CMPrsr(Move) : __slots__ = ()
+class EORri(Move) : __slots__ = ()
+class EORrr(Move) : __slots__ = ()
+class EORrsi(Move) : __slots__ = ()
+class EORrsr(Move) : __slots__ = ()
+class MOVTi16(Move) : __slots__ = ()
+class MOVi(Move) : __slots__ = ()
+class MOVi16(Move) : __slots__ = ()
+class MOVr(Move) : __slots__ = ()
+class MOVsi(Move) : __slots__ = ()
+class MOVsr(Move) : __slots__ = ()
+class MOVPCLR(Move) : __slots__ = ()
+class MVNi(Move) : __slots__ = ()
+class MVNr(Move) : __slots__ = ()
+class MVNsi(Move) : __slots__ = ()
+class MVNsr(Move) : __slots__ = ()
+class ORRri(Move) : __slots__ = ()
+class ORRrr(Move) : __slots__ = ()
+class ORRrsi(Move) : __slots__ = ()
+class ORRrsr(Move) : __slots__ = ()
+class RSBri(Move) : __slots__ = ()
+class RSBrr(Move) : __slots__ = ()
+class RSBrsi(Move) : __slots__ = ()
+class RSBrsr(Move) : __slots__ = ()
+class RSCri(Move) : __slots__ = ()
+class RSCrr(Move) : __slots__ = ()
+class RSCrsi(Move) : __slots__ = ()
+class RSCrsr(Move) : __slots__ = ()
+class SBCri(Move) : __slots__ = ()
+class SBCrr(Move) : __slots__ = ()
+class SBCrsi(Move) : __slots__ = ()
+class SBCrsr(Move) : __slots__ = ()
+class SUBri(Move) : __slots__ = ()
+class SUBrr(Move) : __slots__ = ()
+class SUBrsi(Move) : __slots__ = ()
+class SUBrsr(Move) : __slots__ = ()
+class TEQri(Move) : __slots__ = ()
+class TEQrr(Move) : __slots__ = ()
+class TEQrsi(Move) : __slots__ = ()
+class TEQrsr(Move) : __slots__ = ()
+class TSTri(Move) : __slots__ = ()
+class TSTrr(Move) : __slots__ = ()
+class TSTrsi(Move) : __slots__ = ()
+class TSTrsr(Move) : __slots__ = ()
 
-class BFC(Bits) : pass
-class BFI(Bits) : pass
-class PKHTB(Bits) : pass
-class RBIT(Bits) : pass
-class SBFX(Bits) : pass
-class SWPB(Bits) : pass
-class SXTAB(Bits) : pass
-class SXTAH(Bits) : pass
-class SXTB(Bits) : pass
-class SXTH(Bits) : pass
-class UBFX(Bits) : pass
-class UXTAB(Bits) : pass
-class UXTAH(Bits) : pass
-class UXTB(Bits) : pass
-class UXTH(Bits) : pass
-class REV(Bits) : pass
-class REV16(Bits) : pass
-class CLZ(Bits) : pass
+class BFC(Bits) : __slots__ = ()
+class BFI(Bits) : __slots__ = ()
+class PKHTB(Bits) : __slots__ = ()
+class RBIT(Bits) : __slots__ = ()
+class SBFX(Bits) : __slots__ = ()
+class SWPB(Bits) : __slots__ = ()
+class SXTAB(Bits) : __slots__ = ()
+class SXTAH(Bits) : __slots__ = ()
+class SXTB(Bits) : __slots__ = ()
+class SXTH(Bits) : __slots__ = ()
+class UBFX(Bits) : __slots__ = ()
+class UXTAB(Bits) : __slots__ = ()
+class UXTAH(Bits) : __slots__ = ()
+class UXTB(Bits) : __slots__ = ()
+class UXTH(Bits) : __slots__ = ()
+class REV(Bits) : __slots__ = ()
+class REV16(Bits) : __slots__ = ()
+class CLZ(Bits) : __slots__ = ()
 
 
-class MLA(Mult) : pass
-class MLS(Mult) : pass
-class MUL(Mult) : pass
-class SMLABB(Mult) : pass
-class SMLAD(Mult) : pass
-class SMLAL(Mult) : pass
-class SMLALBT(Mult) : pass
-class SMLAWB(Mult) : pass
-class SMUAD(Mult) : pass
-class SMULBB(Mult) : pass
-class SMULL(Mult) : pass
-class SMULTB(Mult) : pass
-class UMLAL(Mult) : pass
-class UMULL(Mult) : pass
+class MLA(Mult) : __slots__ = ()
+class MLS(Mult) : __slots__ = ()
+class MUL(Mult) : __slots__ = ()
+class SMLABB(Mult) : __slots__ = ()
+class SMLAD(Mult) : __slots__ = ()
+class SMLAL(Mult) : __slots__ = ()
+class SMLALBT(Mult) : __slots__ = ()
+class SMLAWB(Mult) : __slots__ = ()
+class SMUAD(Mult) : __slots__ = ()
+class SMULBB(Mult) : __slots__ = ()
+class SMULL(Mult) : __slots__ = ()
+class SMULTB(Mult) : __slots__ = ()
+class UMLAL(Mult) : __slots__ = ()
+class UMULL(Mult) : __slots__ = ()
 
-class LDMDA(Mem) : pass
-class LDMDA_UPD(Mem) : pass
-class LDMDB(Mem) : pass
-class LDMDB_UPD(Mem) : pass
-class LDMIA(Mem) : pass
-class LDMIA_UPD(Mem) : pass
-class LDMIB(Mem) : pass
-class LDMIB_UPD(Mem) : pass
-class STMDA(Mem) : pass
-class STMDA_UPD(Mem) : pass
-class STMDB(Mem) : pass
-class STMDB_UPD(Mem) : pass
-class STMIA(Mem) : pass
-class STMIA_UPD(Mem) : pass
-class STMIB(Mem) : pass
-class STMIB_UPD(Mem) : pass
-class LDRBT_POST_IMM(Mem) : pass
-class LDRBT_POST_REG(Mem) : pass
-class LDRB_POST_IMM(Mem) : pass
-class LDRB_POST_REG(Mem) : pass
-class LDRB_PRE_IMM(Mem) : pass
-class LDRB_PRE_REG(Mem) : pass
-class LDRBi12(Mem) : pass
-class LDRBrs(Mem) : pass
-class LDRD(Mem) : pass
-class LDRD_POST(Mem) : pass
-class LDRD_PRE(Mem) : pass
-class LDREX(Mem) : pass
-class LDREXB(Mem) : pass
-class LDREXD(Mem) : pass
-class LDREXH(Mem) : pass
-class LDRH(Mem) : pass
-class LDRHTr(Mem) : pass
-class LDRH_POST(Mem) : pass
-class LDRH_PRE(Mem) : pass
-class LDRSB(Mem) : pass
-class LDRSBTr(Mem) : pass
-class LDRSB_POST(Mem) : pass
-class LDRSB_PRE(Mem) : pass
-class LDRSH(Mem) : pass
-class LDRSHTi(Mem) : pass
-class LDRSHTr(Mem) : pass
-class LDRSH_POST(Mem) : pass
-class LDRSH_PRE(Mem) : pass
-class LDRT_POST_REG(Mem) : pass
-class LDR_POST_IMM(Mem) : pass
-class LDR_POST_REG(Mem) : pass
-class LDR_PRE_IMM(Mem) : pass
-class LDR_PRE_REG(Mem) : pass
-class LDRi12(Mem) : pass
-class LDRrs(Mem) : pass
-class STRBT_POST_IMM(Mem) : pass
-class STRBT_POST_REG(Mem) : pass
-class STRB_POST_IMM(Mem) : pass
-class STRB_POST_REG(Mem) : pass
-class STRB_PRE_IMM(Mem) : pass
-class STRB_PRE_REG(Mem) : pass
-class STRBi12(Mem) : pass
-class STRBrs(Mem) : pass
-class STRD(Mem) : pass
-class STRD_POST(Mem) : pass
-class STRD_PRE(Mem) : pass
-class STREX(Mem) : pass
-class STREXB(Mem) : pass
-class STREXD(Mem) : pass
-class STREXH(Mem) : pass
-class STRH(Mem) : pass
-class STRHTr(Mem) : pass
-class STRH_POST(Mem) : pass
-class STRH_PRE(Mem) : pass
-class STRT_POST_REG(Mem) : pass
-class STR_POST_IMM(Mem) : pass
-class STR_POST_REG(Mem) : pass
-class STR_PRE_IMM(Mem) : pass
-class STR_PRE_REG(Mem) : pass
-class STRi12(Mem) : pass
-class STRrs(Mem) : pass
+class LDMDA(Mem) : __slots__ = ()
+class LDMDA_UPD(Mem) : __slots__ = ()
+class LDMDB(Mem) : __slots__ = ()
+class LDMDB_UPD(Mem) : __slots__ = ()
+class LDMIA(Mem) : __slots__ = ()
+class LDMIA_UPD(Mem) : __slots__ = ()
+class LDMIB(Mem) : __slots__ = ()
+class LDMIB_UPD(Mem) : __slots__ = ()
+class STMDA(Mem) : __slots__ = ()
+class STMDA_UPD(Mem) : __slots__ = ()
+class STMDB(Mem) : __slots__ = ()
+class STMDB_UPD(Mem) : __slots__ = ()
+class STMIA(Mem) : __slots__ = ()
+class STMIA_UPD(Mem) : __slots__ = ()
+class STMIB(Mem) : __slots__ = ()
+class STMIB_UPD(Mem) : __slots__ = ()
+class LDRBT_POST_IMM(Mem) : __slots__ = ()
+class LDRBT_POST_REG(Mem) : __slots__ = ()
+class LDRB_POST_IMM(Mem) : __slots__ = ()
+class LDRB_POST_REG(Mem) : __slots__ = ()
+class LDRB_PRE_IMM(Mem) : __slots__ = ()
+class LDRB_PRE_REG(Mem) : __slots__ = ()
+class LDRBi12(Mem) : __slots__ = ()
+class LDRBrs(Mem) : __slots__ = ()
+class LDRD(Mem) : __slots__ = ()
+class LDRD_POST(Mem) : __slots__ = ()
+class LDRD_PRE(Mem) : __slots__ = ()
+class LDREX(Mem) : __slots__ = ()
+class LDREXB(Mem) : __slots__ = ()
+class LDREXD(Mem) : __slots__ = ()
+class LDREXH(Mem) : __slots__ = ()
+class LDRH(Mem) : __slots__ = ()
+class LDRHTr(Mem) : __slots__ = ()
+class LDRH_POST(Mem) : __slots__ = ()
+class LDRH_PRE(Mem) : __slots__ = ()
+class LDRSB(Mem) : __slots__ = ()
+class LDRSBTr(Mem) : __slots__ = ()
+class LDRSB_POST(Mem) : __slots__ = ()
+class LDRSB_PRE(Mem) : __slots__ = ()
+class LDRSH(Mem) : __slots__ = ()
+class LDRSHTi(Mem) : __slots__ = ()
+class LDRSHTr(Mem) : __slots__ = ()
+class LDRSH_POST(Mem) : __slots__ = ()
+class LDRSH_PRE(Mem) : __slots__ = ()
+class LDRT_POST_REG(Mem) : __slots__ = ()
+class LDR_POST_IMM(Mem) : __slots__ = ()
+class LDR_POST_REG(Mem) : __slots__ = ()
+class LDR_PRE_IMM(Mem) : __slots__ = ()
+class LDR_PRE_REG(Mem) : __slots__ = ()
+class LDRi12(Mem) : __slots__ = ()
+class LDRrs(Mem) : __slots__ = ()
+class STRBT_POST_IMM(Mem) : __slots__ = ()
+class STRBT_POST_REG(Mem) : __slots__ = ()
+class STRB_POST_IMM(Mem) : __slots__ = ()
+class STRB_POST_REG(Mem) : __slots__ = ()
+class STRB_PRE_IMM(Mem) : __slots__ = ()
+class STRB_PRE_REG(Mem) : __slots__ = ()
+class STRBi12(Mem) : __slots__ = ()
+class STRBrs(Mem) : __slots__ = ()
+class STRD(Mem) : __slots__ = ()
+class STRD_POST(Mem) : __slots__ = ()
+class STRD_PRE(Mem) : __slots__ = ()
+class STREX(Mem) : __slots__ = ()
+class STREXB(Mem) : __slots__ = ()
+class STREXD(Mem) : __slots__ = ()
+class STREXH(Mem) : __slots__ = ()
+class STRH(Mem) : __slots__ = ()
+class STRHTr(Mem) : __slots__ = ()
+class STRH_POST(Mem) : __slots__ = ()
+class STRH_PRE(Mem) : __slots__ = ()
+class STRT_POST_REG(Mem) : __slots__ = ()
+class STR_POST_IMM(Mem) : __slots__ = ()
+class STR_POST_REG(Mem) : __slots__ = ()
+class STR_PRE_IMM(Mem) : __slots__ = ()
+class STR_PRE_REG(Mem) : __slots__ = ()
+class STRi12(Mem) : __slots__ = ()
+class STRrs(Mem) : __slots__ = ()
 
-class BL(Branch) : pass
-class BLX(Branch) : pass
-class BLX_pred(Branch) : pass
-class BLXi(Branch) : pass
-class BL_pred(Branch) : pass
-class BX(Branch) : pass
-class BX_RET(Branch) : pass
-class BX_pred(Branch) : pass
-class Bcc(Branch) : pass
+class BL(Branch) : __slots__ = ()
+class BLX(Branch) : __slots__ = ()
+class BLX_pred(Branch) : __slots__ = ()
+class BLXi(Branch) : __slots__ = ()
+class BL_pred(Branch) : __slots__ = ()
+class BX(Branch) : __slots__ = ()
+class BX_RET(Branch) : __slots__ = ()
+class BX_pred(Branch) : __slots__ = ()
+class Bcc(Branch) : __slots__ = ()
 
-class CPS2p(Special) : pass
-class DMB(Special) : pass
-class DSB(Special) : pass
-class HINT(Special) : pass
-class MRS(Special) : pass
-class MSR(Special) : pass
-class PLDi12(Special) : pass
-class SVC(Special) : pass
+class CPS2p(Special) : __slots__ = ()
+class DMB(Special) : __slots__ = ()
+class DSB(Special) : __slots__ = ()
+class HINT(Special) : __slots__ = ()
+class MRS(Special) : __slots__ = ()
+class MSR(Special) : __slots__ = ()
+class PLDi12(Special) : __slots__ = ()
+class SVC(Special) : __slots__ = ()
 
 
 def loads(s):
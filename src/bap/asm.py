@@ -4,21 +4,21 @@
 
 from .adt import ADT
 
-class Kind(ADT) : pass
-class Having_side_effects(Kind)    : pass
-class Affecting_control(Kind)      : pass
-class Branch(Affecting_control)    : pass
-class Conditional_branch(Branch)    : pass
-class Unconditional_branch(Branch)  : pass
-class Indirect_branch(Branch)       : pass
-class Return(Affecting_control)    : pass
-class Call(Affecting_control)      : pass
-class Barrier(Affecting_control)   : pass
-class Terminator(Affecting_control): pass
-class May_affect_control_flow(Affecting_control) : pass
-class May_load(Having_side_effects)     : pass
-class May_store(Having_side_effects)    : pass
-class Valid(Kind) : pass
+class Kind(ADT) : __slots__ = ()
+class Having_side_effects(Kind)    : __slots__ = ()
+class Affecting_control(Kind)      : __slots__ = ()
+class Branch(Affecting_control)    : __slots__ = ()
+class Conditional_branch(Branch)    : __slots__ = ()
+class Unconditional_branch(Branch)  : __slots__ = ()
+class Indirect_branch(Branch)       : __slots__ = ()
+class Return(Affecting_control)    : __slots__ = ()
+class Call(Affecting_control)      : __slots__ = ()
+class Barrier(Affecting_control)   : __slots__ = ()
+class Terminator(Affecting_control): __slots__ = ()
+class May_affect_control_flow(Affecting_control) : __slots__ = ()
+class May_load(Having_side_effects)     : __slots__ = ()
+class May_store(Having_side_effects)    : __slots__ = ()
+class Valid(Kind) : __slots__ = ()
 
 
 def eval_if_not_adt(s):
@@ -52,10 +52,10 @@ class Insn(object) :
         return 'Insn("{name}", {addr:#010x}, {size}, "{asm}", {kinds}, {operands})'.\
           format(**self.__dict__)
 
-class Op(ADT)        : pass
-class Reg(Op)        : pass
-class Imm(Op)        : pass
-class Fmm(Op)        : pass
+class Op(ADT)        : __slots__ = ()
+class Reg(Op)        : __slots__ = ()
+class Imm(Op)        : __slots__ = ()
+class Fmm(Op)        : __slots__ = ()
 
 
 def exists(cont,f):
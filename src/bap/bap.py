@@ -1,5 +1,25 @@
+import mmap
+import multiprocessing
+import os
+import select
+import signal
+import tempfile
+import threading
+from collections import deque
 from subprocess import Popen,PIPE
-from . import bir
+from . import binfmt, bir, noeval_parser
+from .adt import ADT
+from .cache import Cache
+try:
+    import resource
+except ImportError: # not a unix
+    resource = None
+try:
+    from multiprocessing.connection import wait
+except ImportError: # python2
+    def wait(connections):
+        "waits until some of the connections are ready"
+        return select.select(connections, [], [])[0]
 
 
 class BapError(Exception):
@@ -53,15 +73,68 @@ class Killed(BapError):
             self.info()
         ])
 
+class Timeout(BapError):
+    "Raised when bap subprocess is killed, as it doesn't finish in time"
+    def __init__(self, timeout, *args):
+        super(Timeout, self).__init__(*args)
+        self.timeout = timeout
+
+    def __str__(self):
+        return '\n'.join([
+            "killed after the timeout of {0} seconds".format(self.timeout),
+            self.info()
+        ])
+
+class OutOfMemory(BapError):
+    "Raised when bap subprocess fails after reaching the memory limit"
+    def __init__(self, limit, *args):
+        super(OutOfMemory, self).__init__(*args)
+        self.limit = limit
+
+    def __str__(self):
+        return '\n'.join([
+            "exceeded the memory limit of {0} bytes".format(self.limit),
+            self.info()
+        ])
+
+class WorkerLost(BapError):
+    "Raised when a worker process of run_many dies before finishing its job"
+    def __init__(self, exitcode, *args):
+        super(WorkerLost, self).__init__(*args)
+        self.exitcode = exitcode
+
+    def __str__(self):
+        return '\n'.join([
+            "the worker process exited with code {0}".format(self.exitcode),
+            self.info()
+        ])
+
 
 adt_project_parser = {
     'format' : 'adt',
-    'load' : bir.loads
+    'load' : bir.loads,
+    'incremental' : noeval_parser.IncrementalParser
 }
 
+# the size of a chunk read from bap's output in the streaming mode
+CHUNK_SIZE = 1 << 16
+
+# the size of a chunk fed to the parser from a mapped output file
+FILE_CHUNK_SIZE = 1 << 20
+
+# a cache miss
+_MISSING = object()
 
-def run(path, args=[], bap='bap', parser=adt_project_parser):
-    r"""run(file[, args] [, bap=PATH] [,parser=PARSER]) -> project
+# a rough upper bound of the memory, that a parsed project takes, per
+# byte of the analyzed binary
+MEMORY_PER_BYTE = 100
+
+
+def run(path, args=[], bap='bap', parser=adt_project_parser, stream=False,
+        cache=None, timeout=None, memory_limit=None, via_file=False):
+    r"""run(file[, args] [, bap=PATH] [,parser=PARSER] [,stream=False]
+           [,cache=CACHE] [,timeout=SECONDS] [,memory_limit=BYTES]
+           [,via_file=False]) -> project
 
     Run bap on a specified `file`, wait until it finishes, parse
     and return the result, using project data structure as default.
@@ -82,13 +155,27 @@ def run(path, args=[], bap='bap', parser=adt_project_parser):
 
     By default a project data structure is dumped in ADT format and
     loaded into `bir.Project` data structure. To parse other formats,
-    a parser argument can be specified. It must be a dictionary, that
-    may contain the following two fields:
+    a parser argument can be specified. It must be a dictionary (or a
+    list of them, see below), that may contain the following fields:
 
       - `format` - a format name as accepted by bap's `--dump` option,
                    it will passed to bap.
       - `load` - a function that parses the output.
+      - `incremental` - a function that returns an object with
+                   `feed(chunk)` and `close()` methods, the latter
+                   returns the parsed output. It is used instead of
+                   `load` in the streaming mode.
+
+
+    If `stream` is true, then the output is parsed while bap is still
+    running, chunk by chunk, as soon as bap prints it, and the whole
+    output is never held in memory. If the parser doesn't provide the
+    `incremental` function, then the output is accumulated and passed
+    to `load` as usual. The standard error is drained concurrently.
+    The same exceptions as in the default mode are raised, except that
+    they do not carry the standard output, if it was parsed incrementally.
 
+    >>> proj = run('/bin/true', stream=True)
 
     In case of errors, the `load` function must raise `SyntaxError`
     exception. Example:
@@ -99,6 +186,54 @@ def run(path, args=[], bap='bap', parser=adt_project_parser):
     then the program output is returned as is.
 
 
+    If `cache` is specified, then it must be either a `bap.cache.Cache`
+    instance or a path to a cache directory. The result is looked up
+    by the contents of the file, the arguments, the parser and the
+    bap executable, and on a hit bap is not run at all. Otherwise, the
+    result is stored in the cache. See `bap.cache` for the details.
+
+    >>> proj = run('/bin/true', cache='/tmp/bap-cache')
+
+
+    If `timeout` is specified, then bap is killed, if it doesn't finish
+    in `timeout` seconds, and the Timeout exception is raised. If
+    `memory_limit` is specified, then the address space of bap is
+    limited to `memory_limit` bytes (with RLIMIT_AS, so it is only
+    supported on Unix), and the OutOfMemory exception is raised if
+    bap fails after an allocation failure. Both exceptions carry the
+    standard error of bap.
+
+    >>> proj = run('/bin/true', timeout=600, memory_limit=8 << 30)
+
+    If run is interrupted, e.g., with KeyboardInterrupt, then bap is
+    killed.
+
+
+    If `via_file` is true, then bap dumps the output into a temporary
+    file (using the `-dFORMAT:FILE` option), instead of the standard
+    output. After bap finishes, the file is mapped into memory and fed
+    chunk by chunk to the incremental parser, then removed. If there
+    is no incremental parser, then the memory map itself is passed to
+    `load`, so it must accept a bytes-like object, e.g., `bir.loads`
+    does, and must not keep it after it returns. The output is not
+    copied through a pipe and is never held in memory as a whole, so
+    for huge projects the peak memory is roughly the size of the parsed
+    project. The `stream` flag is ignored in this mode, and exceptions
+    do not carry the standard output.
+
+    >>> proj = run('/bin/true', via_file=True)
+
+
+    To obtain several formats from one run of bap, pass a list of
+    parsers, each with a distinct `format`. Every output is dumped into
+    its own temporary file, as in the `via_file` mode, all outputs are
+    parsed after bap finishes, and a dictionary of the results keyed
+    by the format is returned:
+
+    >>> out = run('/bin/true', parser=[adt_project_parser, {'format': 'asm'}])
+    >>> proj, listing = out['adt'], out['asm']
+
+
     Exceptions
     ----------
 
@@ -106,18 +241,42 @@ def run(path, args=[], bap='bap', parser=adt_project_parser):
     with OSError being the most common one. If everything went fine on
     the system level, then may raise SyntaxError at the parsing step.
     Also may raise Failed or Killed exceptions in case if the return code
-    wasn't zero.
+    wasn't zero, or Timeout and OutOfMemory exceptions if the limits
+    were exceeded.
 
 
     """
+    if cache is not None:
+        return _run_cached(cache, path, args, bap, parser, stream,
+                           timeout, memory_limit, via_file)
+
     opts = [bap, path] + args
 
+    if isinstance(parser, (list, tuple)):
+        formats = [p.get('format') for p in parser]
+        if None in formats or len(set(formats)) != len(formats):
+            raise ValueError('each parser must have a distinct format')
+        return dict(zip(formats, _run_via_files(opts, parser, timeout, memory_limit)))
+
     if parser and 'format' in parser:
+        if via_file:
+            return _run_via_files(opts, [parser], timeout, memory_limit)[0]
         opts += ['-d{format}'.format(**parser)]
 
-    bap = Popen(opts, stdout=PIPE, stderr=PIPE)
-    out,err = bap.communicate()
-
+    limits = _Limits(timeout, memory_limit)
+    bap = Popen(opts, stdout=PIPE, stderr=PIPE, preexec_fn=limits.preexec())
+    limits.start(bap)
+    if stream:
+        return _run_streaming(bap, opts, parser, limits)
+    try:
+        out,err = bap.communicate()
+    finally:
+        limits.stop()
+        if bap.poll() is None:
+            bap.kill()
+            bap.wait()
+
+    limits.check(bap, opts, out, err)
     if bap.returncode == 0:
         try:
             if parser and 'load' in parser:
@@ -130,3 +289,296 @@ def run(path, args=[], bap='bap', parser=adt_project_parser):
         raise Killed(-bap.returncode, opts, out, err)
     else:
         raise Failed(bap.returncode, opts, out, err)
+
+
+def _run_via_files(opts, parsers, timeout, memory_limit):
+    """runs bap, that dumps the output of each parser into a temporary
+    file, and returns the list of the parsed files"""
+    names = []
+    try:
+        for parser in parsers:
+            fd, name = tempfile.mkstemp(prefix='bap-', suffix='.' + parser['format'])
+            os.close(fd)
+            names.append(name)
+            opts = opts + ['-d{0}:{1}'.format(parser['format'], name)]
+        limits = _Limits(timeout, memory_limit)
+        bap = Popen(opts, stdout=PIPE, stderr=PIPE, preexec_fn=limits.preexec())
+        limits.start(bap)
+        try:
+            _, err = bap.communicate()
+        finally:
+            limits.stop()
+            if bap.poll() is None:
+                bap.kill()
+                bap.wait()
+
+        limits.check(bap, opts, None, err)
+        if bap.returncode == 0:
+            results = []
+            for name, parser in zip(names, parsers):
+                try:
+                    results.append(_load_file(name, parser))
+                except SyntaxError as exn:
+                    raise MalformedOutput(exn, opts, None, err)
+                os.remove(name) # release the disk space early
+            return results
+        elif bap.returncode < 0:
+            raise Killed(-bap.returncode, opts, None, err)
+        else:
+            raise Failed(bap.returncode, opts, None, err)
+    finally:
+        for name in names:
+            if os.path.exists(name):
+                os.remove(name)
+
+
+def _load_file(name, parser):
+    """parses the file from a memory map"""
+    with open(name, 'rb') as inp:
+        size = os.fstat(inp.fileno()).st_size
+        if size == 0: # an empty file can't be mapped
+            data = b''
+        else:
+            data = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if 'incremental' in parser:
+                loader = parser['incremental']()
+                for pos in range(0, size, FILE_CHUNK_SIZE):
+                    loader.feed(data[pos:pos + FILE_CHUNK_SIZE])
+                return loader.close()
+            elif 'load' in parser:
+                return parser['load'](data)
+            else:
+                return data[:]
+        finally:
+            if size:
+                data.close()
+
+
+def _run_cached(cache, path, args, bap, parser, stream, timeout, memory_limit,
+                via_file):
+    """looks up the result in the cache, or runs bap and stores it"""
+    if not isinstance(cache, Cache):
+        cache = Cache(cache)
+    key = cache.key(path, args, bap, parser)
+    result = cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = run(path, args, bap, parser, stream,
+                     timeout=timeout, memory_limit=memory_limit, via_file=via_file)
+        cache.put(key, result)
+    return result
+
+
+class _Limits(object):
+    """enforces the timeout and the memory limit of a bap process"""
+
+    # messages of failed allocations (OCaml, C and Python)
+    MESSAGES = (b'out_of_memory', b'out of memory',
+                b'cannot allocate memory', b'memoryerror')
+
+    # signals, that a process may die of, when it runs out of memory
+    SIGNALS = tuple(getattr(signal, name) for name in
+                    ('SIGSEGV', 'SIGABRT', 'SIGKILL', 'SIGBUS')
+                    if hasattr(signal, name))
+
+    def __init__(self, timeout, memory_limit):
+        if memory_limit is not None and resource is None:
+            raise ValueError('memory limits are not supported on this platform')
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.expired = False
+        self._timer = None
+
+    def preexec(self):
+        """returns a function, that sets the limits in the child process"""
+        if self.memory_limit is None:
+            return None
+        limit = self.memory_limit
+        return lambda: resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    def start(self, proc):
+        """starts the timer, that kills the process"""
+        if self.timeout is not None:
+            self._timer = threading.Timer(self.timeout, self._expire, [proc])
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def check(self, proc, opts, out, err):
+        """raises Timeout or OutOfMemory, if the process has failed
+        because of one of the limits"""
+        if proc.returncode == 0:
+            return
+        if self.expired:
+            raise Timeout(self.timeout, opts, out, err)
+        if self.memory_limit is not None and (
+                -proc.returncode in self.SIGNALS or
+                any(msg in err.lower() for msg in self.MESSAGES)):
+            raise OutOfMemory(self.memory_limit, opts, out, err)
+
+    def _expire(self, proc):
+        self.expired = True
+        try:
+            proc.kill()
+        except OSError: # already finished
+            pass
+
+
+def _run_streaming(bap, opts, parser, limits):
+    """parses the output of the running bap process as it is produced"""
+    errs = []
+    drain = threading.Thread(target=lambda: errs.append(bap.stderr.read()))
+    drain.daemon = True
+    drain.start()
+
+    loader = None
+    if parser and 'incremental' in parser:
+        loader = parser['incremental']()
+    chunks = []
+    failure = None
+    try:
+        for chunk in iter(lambda: bap.stdout.read(CHUNK_SIZE), b''):
+            if loader is None:
+                chunks.append(chunk)
+            elif failure is None:
+                try:
+                    loader.feed(chunk)
+                except Exception as exn:
+                    failure = exn # report it only if bap has succeeded
+        bap.wait()
+        drain.join()
+    finally:
+        limits.stop()
+        if bap.poll() is None:
+            bap.kill()
+            bap.wait()
+
+    out = None if loader else b''.join(chunks)
+    err = errs[0] if errs else b''
+
+    limits.check(bap, opts, out, err)
+    if bap.returncode == 0:
+        try:
+            if failure is not None:
+                raise failure
+            if loader is not None:
+                return loader.close()
+            elif parser and 'load' in parser:
+                return parser['load'](out)
+            else:
+                return out
+        except SyntaxError as exn:
+            raise MalformedOutput(exn, opts, out, err)
+    elif bap.returncode < 0:
+        raise Killed(-bap.returncode, opts, out, err)
+    else:
+        raise Failed(bap.returncode, opts, out, err)
+
+
+def run_many(paths, args=[], bap='bap', parser=adt_project_parser,
+             processes=None, memory_limit=None, estimate=None, cache=None):
+    r"""run_many(files[, args] [, bap=PATH] [,parser=PARSER]
+                [,processes=N] [,memory_limit=BYTES] [,estimate=FN]
+                [,cache=CACHE]) -> iterator of (file, result)
+
+    Run bap on each file, with at most `processes` (defaults to the
+    number of CPUs) running at once. Both bap and the parser are run
+    in worker processes. Yields pairs of a file and its result, in
+    the order of completion. The result is either the parsed output,
+    the same as the one of `run(file, args, bap, parser, cache=cache)`,
+    or an exception, that `run` would raise, e.g., Failed, Killed or
+    MalformedOutput, or WorkerLost.
+
+    >>> for path, proj in run_many(paths):
+    ...     if isinstance(proj, Exception):
+    ...         print('failed to analyze {0}: {1}'.format(path, proj))
+
+    To prevent several huge parses from exhausting memory, a job is
+    not started, while the memory estimated for the running jobs
+    together with it exceeds `memory_limit` (defaults to half of the
+    physical memory, if it is known). A job is always started when no
+    other jobs are running. The `estimate` function takes a path and
+    returns the number of bytes, by default it is the size of the file
+    times MEMORY_PER_BYTE.
+
+    The parser (and the cache) are passed to the workers, so they must
+    be picklable, e.g., the `load` function can't be a lambda.
+
+    Each job runs in its own worker process, so if a worker dies,
+    e.g., it is killed by the kernel when the host runs out of memory,
+    then only its job is lost, and the WorkerLost exception is yielded
+    as its result. Closing the iterator terminates the workers.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    if memory_limit is None:
+        memory_limit = _physical_memory() // 2 or float('inf')
+    if estimate is None:
+        estimate = _estimate_memory
+    pending = deque(paths)
+    running = {} # connection -> (worker, path, estimated memory)
+    used = 0
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                path = pending[0]
+                size = estimate(path)
+                if running and used + size > memory_limit:
+                    break
+                pending.popleft()
+                conn, child = multiprocessing.Pipe(duplex=False)
+                worker = multiprocessing.Process(
+                    target=_run_job, args=(child, path, args, bap, parser, cache))
+                worker.daemon = True
+                worker.start()
+                child.close() # the pipe is closed, when the worker exits
+                running[conn] = worker, path, size
+                used += size
+            for conn in wait(list(running)):
+                worker, path, size = running.pop(conn)
+                used -= size
+                try:
+                    kind, result = conn.recv()
+                except EOFError: # the worker died before sending the result
+                    worker.join()
+                    kind, result = 'error', WorkerLost(
+                        worker.exitcode, [bap, path] + list(args), None, None)
+                conn.close()
+                worker.join()
+                if kind == 'adt':
+                    result = binfmt.loads(result)
+                yield path, result
+    finally:
+        for conn, (worker, _, _) in running.items():
+            worker.terminate()
+            worker.join()
+            conn.close()
+
+
+def _run_job(conn, path, args, bap, parser, cache):
+    """runs bap in a worker, a project is passed back in the binary format"""
+    try:
+        result = run(path, args, bap, parser, cache=cache)
+    except Exception as exn:
+        result = 'error', exn
+    else:
+        if isinstance(result, ADT):
+            result = 'adt', binfmt.dumps(result)
+        else:
+            result = 'ok', result
+    conn.send(result)
+    conn.close()
+
+def _estimate_memory(path):
+    try:
+        return os.path.getsize(path) * MEMORY_PER_BYTE
+    except OSError:
+        return 0
+
+def _physical_memory():
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return 0
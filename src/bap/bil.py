@@ -5,9 +5,13 @@
 from .adt import *
 
 
-class Exp(ADT)  : pass     # Abstract base for all expressions
+class Exp(ADT)  :  # Abstract base for all expressions
+    __slots__ = ()
+    contains = ('Exp', 'Type', 'Endian')
 class Load(Exp):
     "Load(mem,idx,endian,size)"
+    __slots__ = ()
+    contains = ('Exp', 'Endian')
     @property
     def mem(self) : return self.arg[0]
     @property
@@ -20,6 +24,8 @@ class Load(Exp):
 
 class Store(Exp):
     "Store(mem,idx,val,endian,size)"
+    __slots__ = ()
+    contains = ('Exp', 'Endian')
     @property
     def mem(self) : return self.arg[0]
     @property
@@ -33,15 +39,21 @@ class Store(Exp):
 
 class BinOp(Exp):
     "Abstract base for all binary operators"
+    __slots__ = ()
+    contains = ('Exp',)
     @property
     def lhs(self): return self.arg[0]
     @property
     def rhs(self): return self.arg[1]
 
-class UnOp(Exp) : pass     # Abstract base for all unary operators
+class UnOp(Exp) :  # Abstract base for all unary operators
+    __slots__ = ()
+    contains = ('Exp',)
 
 class Var(Exp)  :
     "Var(name,type)"
+    __slots__ = ()
+    contains = ('Type',)
     @property
     def name(self): return self.arg[0]
     @property
@@ -49,6 +61,8 @@ class Var(Exp)  :
 
 class Int(Exp):
     "Int(int,size)"
+    __slots__ = ()
+    contains = ()
     @property
     def value(self): return self.arg[0]
     @property
@@ -58,6 +72,8 @@ class Int(Exp):
 
 class Cast(Exp) :
     "Abstract base for all cast operations"
+    __slots__ = ()
+    contains = ('Exp',)
     @property
     def size(self): return self.arg[0]
     @property
@@ -65,6 +81,8 @@ class Cast(Exp) :
 
 class Let(Exp)  :
     "Let(var,val,expr)"
+    __slots__ = ()
+    contains = ('Var', 'Exp')
     @property
     def var(self): return self.arg[0]
     @property
@@ -74,6 +92,8 @@ class Let(Exp)  :
 
 class Unknown(Exp):
     "Unknown(string,type)"
+    __slots__ = ()
+    contains = ('Type',)
     @property
     def desc(self): return self.arg[0]
     @property
@@ -81,6 +101,8 @@ class Unknown(Exp):
 
 class Ite(Exp):
     "Ite (cond,if_true,if_false)"
+    __slots__ = ()
+    contains = ('Exp',)
     @property
     def cond(self): return self.arg[0]
     @property
@@ -90,6 +112,8 @@ class Ite(Exp):
 
 class Extract(Exp):
     "Extract(hb,lb, exp)"
+    __slots__ = ()
+    contains = ('Exp',)
     @property
     def high_bit(self): return self.arg[0]
     @property
@@ -98,24 +122,36 @@ class Extract(Exp):
     def expr(self): return self.arg[2]
 
 class Concat(Exp):
+    __slots__ = ()
+    contains = ('Exp',)
     @property
     def lhs(self): return self.arg[0]
     @property
     def rhs(self): return self.arg[1]
 
-class Stmt(ADT) : pass     # Abstract base for all statements
+class Stmt(ADT) :  # Abstract base for all statements
+    __slots__ = ()
+    contains = ('Var', 'Exp', 'Stmt')
 
 class Move(Stmt) :
     "Move(var,exp)"
+    __slots__ = ()
+    contains = ('Var', 'Exp')
     @property
     def var(self): return self.arg[0]
     @property
     def expr(self): return self.arg[1]
 
-class Jmp(Stmt) : pass     # Jmp(exp)
-class Special(Stmt): pass  # Special (string)
+class Jmp(Stmt) :  # Jmp(exp)
+    __slots__ = ()
+    contains = ('Exp',)
+class Special(Stmt):  # Special (string)
+    __slots__ = ()
+    contains = ()
 class While(Stmt) :
     "While (cond, stmts)"
+    __slots__ = ()
+    contains = ('Exp', 'Stmt')
     @property
     def cond(self): return self.arg[0]
 
@@ -124,6 +160,8 @@ class While(Stmt) :
 
 class If(Stmt) :
     "If(cond, yes-exprs, no-exprs)"
+    __slots__ = ()
+    contains = ('Exp', 'Stmt')
     @property
     def cond(self): return self.arg[0]
     @property
@@ -131,52 +169,60 @@ class If(Stmt) :
     @property
     def false(self): return self.arg[2]
 
-class CpuExn(Stmt) : pass  # CpuExn(n)
+class CpuExn(Stmt) :  # CpuExn(n)
+    __slots__ = ()
+    contains = ()
 
 # All BinOps have two operands of type exp
-class PLUS    (BinOp) : pass
-class MINUS   (BinOp) : pass
-class TIMES   (BinOp) : pass
-class DIVIDE  (BinOp) : pass
-class SDIVIDE (BinOp) : pass
-class MOD     (BinOp) : pass
-class SMOD    (BinOp) : pass
-class LSHIFT  (BinOp) : pass
-class RSHIFT  (BinOp) : pass
-class ARSHIFT (BinOp) : pass
-class AND     (BinOp) : pass
-class OR      (BinOp) : pass
-class XOR     (BinOp) : pass
-class EQ      (BinOp) : pass
-class NEQ     (BinOp) : pass
-class LT      (BinOp) : pass
-class LE      (BinOp) : pass
-class SLT     (BinOp) : pass
-class SLE     (BinOp) : pass
+class PLUS    (BinOp) : __slots__ = ()
+class MINUS   (BinOp) : __slots__ = ()
+class TIMES   (BinOp) : __slots__ = ()
+class DIVIDE  (BinOp) : __slots__ = ()
+class SDIVIDE (BinOp) : __slots__ = ()
+class MOD     (BinOp) : __slots__ = ()
+class SMOD    (BinOp) : __slots__ = ()
+class LSHIFT  (BinOp) : __slots__ = ()
+class RSHIFT  (BinOp) : __slots__ = ()
+class ARSHIFT (BinOp) : __slots__ = ()
+class AND     (BinOp) : __slots__ = ()
+class OR      (BinOp) : __slots__ = ()
+class XOR     (BinOp) : __slots__ = ()
+class EQ      (BinOp) : __slots__ = ()
+class NEQ     (BinOp) : __slots__ = ()
+class LT      (BinOp) : __slots__ = ()
+class LE      (BinOp) : __slots__ = ()
+class SLT     (BinOp) : __slots__ = ()
+class SLE     (BinOp) : __slots__ = ()
 
 # All UnOps have one operand of type exp
-class NEG     (UnOp)  : pass
-class NOT     (UnOp)  : pass
+class NEG     (UnOp)  : __slots__ = ()
+class NOT     (UnOp)  : __slots__ = ()
 
 # All Casts have two operands: (Int(size),exp)
-class UNSIGNED(Cast)  : pass
-class SIGNED(Cast)    : pass
-class HIGH(Cast)      : pass
-class LOW(Cast)       : pass
+class UNSIGNED(Cast)  : __slots__ = ()
+class SIGNED(Cast)    : __slots__ = ()
+class HIGH(Cast)      : __slots__ = ()
+class LOW(Cast)       : __slots__ = ()
 
 # Endians doesn't have values
-class Endian(ADT) : pass
-class LittleEndian(Endian) : pass
-class BigEndian(Endian) : pass
-
-class Type(ADT) : pass  # Abstract base for expression type
+class Endian(ADT) :
+    __slots__ = ()
+    contains = ()
+class LittleEndian(Endian) : __slots__ = ()
+class BigEndian(Endian) : __slots__ = ()
+
+class Type(ADT) :  # Abstract base for expression type
+    __slots__ = ()
+    contains = ()
 class Imm(Type) :
     "Imm(size) - immediate value"
+    __slots__ = ()
     @property
     def size(self): return self.arg
 
 class Mem(Type) :
     "Mem(addr_size, value_size)"
+    __slots__ = ()
     @property
     def addr_size(self): return self.arg[0]
 
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+"""Compact binary format of ADT values.
+
+The format is a faster alternative to the textual ADT syntax, e.g., to
+store loaded projects in a cache:
+
+>>> with open('true.bapb', 'wb') as out:
+        binfmt.dump(proj, out)
+>>> with open('true.bapb', 'rb') as inp:
+        proj = binfmt.load(inp)
+
+A file starts with the MAGIC string, the format VERSION (a big endian
+16 bit number), the version of the marshal module and the major and
+minor versions of Python, that wrote it (a byte each), followed by a
+zlib compressed and marshaled pair of the constructor table and the
+code. The code is a postfix
+program for a stack machine, in which
+
+- a tuple (ctor, n) replaces the n topmost values on the stack with
+  an ADT built by the constructor with the index ctor in the table;
+- a tuple (LIST, n) or (TUPLE, n) replaces the n topmost values with
+  a list or a tuple of them;
+- a tuple (REF, i) pushes the i-th remembered ADT, that lets the
+  writer to preserve shared subtrees (e.g., a hash-consed DAG);
+- an operation tuple with the third element remembers its result;
+- any other value is pushed as is.
+
+Equal strings, integers and operations are written once and then
+referenced (the marshal module takes care of that), so the string
+table is implicit. Instead of variable length integers the code is
+compressed as a whole, that is more compact, and both marshal and zlib
+decode it at the C speed.
+
+A file written by a different version of the format, or by a
+different Python (the marshal format is not guaranteed to be stable
+between Python versions), is rejected with the VersionError, so stale
+caches are easy to detect.
+"""
+
+import gc
+import marshal
+import struct
+import sys
+import zlib
+
+from .adt import ADT, Sequence
+
+MAGIC = b'BAPADT\x00'
+VERSION = 1
+
+LIST, TUPLE, REF = -1, -2, -3
+
+_HEADER = struct.Struct('>%dsHBBB' % len(MAGIC))
+
+# everything in the header, that a reader must match
+STAMP = (VERSION, marshal.version) + tuple(sys.version_info[:2])
+
+class FormatError(Exception):
+    "the input is not in the binary ADT format"
+    pass
+
+class VersionError(FormatError):
+    "the input is written by a different version of the format or Python"
+    def __init__(self, stamp):
+        super(VersionError, self).__init__(
+            'binary ADT format {0}, expected {1}'.format(
+                _describe(stamp), _describe(STAMP)))
+        self.stamp = stamp
+        self.version = stamp[0]
+
+
+def dumps(adt):
+    """dumps(adt) -> bytes
+
+    Returns the binary representation of the ADT.
+    """
+    return _HEADER.pack(MAGIC, *STAMP) + zlib.compress(marshal.dumps(_compile(adt)), 1)
+
+def dump(adt, fileobj):
+    """dump(adt, fileobj) writes the ADT to a binary file"""
+    fileobj.write(dumps(adt))
+
+def loads(data):
+    """loads(data) -> ADT
+
+    Reads an ADT from the binary representation. Constructors are
+    looked up in the bap.bir module, the same as the ADT parser does.
+    """
+    if len(data) < _HEADER.size:
+        raise FormatError('truncated header')
+    header = _HEADER.unpack_from(data)
+    magic, stamp = header[0], header[1:]
+    if magic != MAGIC:
+        raise FormatError('bad magic {0!r}'.format(magic))
+    if stamp != STAMP:
+        raise VersionError(stamp)
+    try:
+        names, code = marshal.loads(zlib.decompress(data[_HEADER.size:]))
+    except (zlib.error, EOFError, ValueError, TypeError) as exn:
+        raise FormatError('malformed data: {0}'.format(exn))
+    # the garbage collector can only slow down building of a tree
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _run(names, code)
+    finally:
+        if enabled:
+            gc.enable()
+
+def load(fileobj):
+    """load(fileobj) -> ADT
+
+    Reads an ADT from a binary file.
+    """
+    return loads(fileobj.read())
+
+
+def _describe(stamp):
+    return 'version {0} (marshal {1}, python {2}.{3})'.format(*stamp)
+
+def _shared(adt):
+    """returns a set of ids of ADT nodes, that occur more than once"""
+    seen = {}
+    shared = set()
+    stack = [adt]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, ADT):
+            if id(x) in seen:
+                shared.add(id(x))
+                continue
+            seen[id(x)] = x
+            arg = x.arg
+            if isinstance(arg, tuple):
+                stack.extend(arg)
+            else:
+                stack.append(arg)
+        elif isinstance(x, (tuple, list)) or _is_sequence(x):
+            stack.extend(x)
+    return shared, seen
+
+def _is_sequence(x):
+    return isinstance(x, Sequence) and not isinstance(x, (str, bytes, type(u'')))
+
+def _compile(adt):
+    """returns the constructor table and the code of the ADT"""
+    shared, alive = _shared(adt) # alive keeps ids unique
+    names = []
+    ctors = {} # class -> index of its name
+    remembered = {} # id -> index
+    atoms = {} # (type, value) -> a single instance of the value
+    code = []
+
+    def emit(op):
+        code.append(atoms.setdefault((op.__class__, op), op))
+
+    stack = [(adt, None)] # (value, its items after they are emitted)
+    while stack:
+        x, items = stack.pop()
+        if items is not None:
+            if isinstance(x, ADT):
+                op = ctors.get(x.__class__)
+                if op is None:
+                    op = ctors[x.__class__] = len(names)
+                    names.append(x.__class__.__name__)
+                if id(x) in shared:
+                    remembered[id(x)] = len(remembered)
+                    emit((op, len(items), True))
+                else:
+                    emit((op, len(items)))
+            else:
+                emit((TUPLE if isinstance(x, tuple) else LIST, len(items)))
+        elif isinstance(x, ADT):
+            if id(x) in remembered:
+                emit((REF, remembered[id(x)]))
+                continue
+            arg = x.arg
+            items = arg if isinstance(arg, tuple) else (arg,)
+            stack.append((x, items))
+            stack.extend((item, None) for item in reversed(items))
+        elif isinstance(x, (tuple, list)) or _is_sequence(x):
+            items = tuple(x)
+            stack.append((x if isinstance(x, tuple) else [], items))
+            stack.extend((item, None) for item in reversed(items))
+        else:
+            emit(x)
+    del alive
+    return tuple(names), code
+
+def _run(names, code):
+    """runs the code and returns the built ADT"""
+    from . import bir
+    try:
+        ctors = [getattr(bir, name) for name in names]
+    except AttributeError as exn:
+        raise FormatError('unknown constructor: {0}'.format(exn))
+    stack = []
+    push = stack.append
+    remembered = []
+    try:
+        for x in code:
+            if x.__class__ is not tuple:
+                push(x)
+                continue
+            op, n = x[0], x[1]
+            if op == REF:
+                push(remembered[n])
+                continue
+            if n:
+                args = stack[-n:]
+                del stack[-n:]
+            else:
+                args = []
+            if op >= 0:
+                value = ctors[op](*args)
+            elif op == LIST:
+                value = args
+            else:
+                value = tuple(args)
+            if len(x) == 3:
+                remembered.append(value)
+            push(value)
+    except (IndexError, TypeError, ValueError) as exn:
+        raise FormatError('malformed code: {0}'.format(exn))
+    if len(stack) != 1:
+        raise FormatError('malformed code: {0} values left'.format(len(stack)))
+    return stack[0]
@@ -7,12 +7,15 @@ try:
 except ImportError:
     from collections import Sequence,Mapping
 from .adt import *
+from .adt import _unique, _mapping_equal, _mapping_hash
 from .bil import *
 from . import noeval_parser
 
 
 class Project(ADT) :
     """A collection of data associated with a disassembled program"""
+    __slots__ = ()
+    contains = ('Attrs', 'Sections', 'Memmap', 'Program')
     @property
     def attrs(self) :
         """A dictionary of attributes that are global to a project.
@@ -56,6 +59,8 @@ class Term(ADT) :
     Every term has a dictionary of attributes, associated with it, and
     a unique term identifier.
     """
+    __slots__ = ()
+    contains = ('Tid', 'Attrs')
     @property
     def id(self) :
         "term.id() -> Tid(id,name)"
@@ -67,6 +72,8 @@ class Term(ADT) :
 class Program(Term) :
     """Program(id,attrs,Subs(s1,s2,..,sN))
      A program is a term that contains a set of subroutines."""
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Subs')
 
     @property
     def subs(self) : return self.arg[2]
@@ -75,6 +82,8 @@ class Sub(Term) :
     """Sub(id,Attrs(...),name,Args(...),Blks(...))
     A subroutine has a sequence of arguments and basic blocks
     """
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Args', 'Blks')
 
     @property
     def name(self) :
@@ -93,6 +102,8 @@ class Sub(Term) :
 
 class Arg(Term) :
     """Arg(id,attrs,lhs,rhs,intent=None) - a subroutine argument"""
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Var', 'Exp', 'Intent')
 
     @property
     def var(self) :
@@ -119,6 +130,8 @@ class Blk(Term) :
     """Blk(id,attrs,(p1,..,pL),(d1,..,dM),(j1,..,jN))
        A basic block is a sequence of phi-nodes, defintions and jumps.
     """
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Phis', 'Defs', 'Jmps')
     @property
     def phis(self) :
         "phi-nodes"
@@ -134,6 +147,8 @@ class Blk(Term) :
 
 class Def(Term) :
     "Def(id,attrs,Var(lhs),Exp(rhs)) assign rhs to lhs"
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Var', 'Exp')
     @property
     def lhs(self) :
         "an assigned variable"
@@ -146,6 +161,8 @@ class Def(Term) :
 
 class Jmp(Term) :
     "Jmp(id,attrs,cond,target) base class for jump terms"
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Exp', 'Label')
     @property
     def cond(self) :
         "guard condition"
@@ -158,11 +175,12 @@ class Jmp(Term) :
 
 class Goto(Jmp) :
     "Goto(id,attrs,cond,target) control flow local to a subroutine"
-    pass
+    __slots__ = ()
 
 class Call(Jmp) :
     """Call(id,attrs,(calee,returns))
     a transfer of control flow to another subroutine"""
+    __slots__ = ()
 
     @property
     def calee(self) :
@@ -176,10 +194,11 @@ class Call(Jmp) :
 
 class Ret(Jmp)  :
     "Ret(id,attrs,label) - return from a call"
-    pass
+    __slots__ = ()
 
 class Exn(Jmp)  :
     "Exn(id,attrs,(number,next)) - CPU exception"
+    __slots__ = ()
     @property
     def number(self) :
         "exception number"
@@ -191,32 +210,39 @@ class Exn(Jmp)  :
         exception handler finishes"""
         return self.target[1]
 
-class Label(ADT) : pass
+class Label(ADT) :
+    __slots__ = ()
+    contains = ()
 
 class Direct(Label) :
     "Direct(tid) a statically known target of a jump"
-    pass
+    __slots__ = ()
+    contains = ('Tid',)
 
 class Indirect(Label) :
     "Indirect(exp) indirect jump that is computed at runtime"
-    pass
+    __slots__ = ()
+    contains = ('Exp',)
 
 class Intent(ADT) :
     "argument intention"
-    pass
+    __slots__ = ()
+    contains = ()
 class In(Intent) :
     "input argument"
-    pass
+    __slots__ = ()
 class Out(Intent) :
     "output argument"
-    pass
+    __slots__ = ()
 class Both(Intent) :
     "input/output argument"
-    pass
+    __slots__ = ()
 
 class Phi(Term) :
     """Phi(id,attrs,lhs,Values(b1,..,bM))) a term whose value
     depends on chosen control flow path"""
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Var', 'Values')
     @property
     def lhs(self) :
         "defined variable"
@@ -230,6 +256,8 @@ class Phi(Term) :
 
 class Def(Term) :
     "Def(id,attrs,lhs,rhs) - assignment"
+    __slots__ = ()
+    contains = ('Tid', 'Attrs', 'Var', 'Exp')
     @property
     def lhs(self) :
         "program variable to be assigned"
@@ -241,13 +269,11 @@ class Def(Term) :
         return self.arg[3]
 
 
-class Attrs(Map) :
-    "A mapping from attribute names to attribute values"
-    pass
-
 class Attr(ADT) :
     """Attribute is a pair of attribute name and value,
     both represented with str"""
+    __slots__ = ()
+    contains = ()
 
     @property
     def name(self):
@@ -259,15 +285,23 @@ class Attr(ADT) :
         """value of attribute"""
         return self.arg[1]
 
+class Attrs(Map) :
+    "A mapping from attribute names to attribute values"
+    __slots__ = ()
+    contains = ('Attr',)
+    pair = Attr
+
 class Values(Map) :
     """A set of possible values, taken by a phi-node.
 
     It is a mapping from the tid of a preceeding block,
     to an expression that denotes a value.
     """
-    def __init__(self, *args):
-        super(Map, self).__init__(args) # pylint: disable=bad-super-call
-        self.elements = dict(args[0])
+    __slots__ = ()
+    contains = ('Tid', 'Exp')
+
+    def _pairs(self):
+        return self.arg[0]
 
 class Tid(ADT) :
     """Tid(id,name=None) term unique identifier.
@@ -276,6 +310,8 @@ class Tid(ADT) :
     doesn't affect the identity.
 
     """
+    __slots__ = ('number', 'name')
+    contains = ()
 
     def __init__(self,*args):
         super(Tid,self).__init__(*args)
@@ -286,35 +322,53 @@ class Tid(ADT) :
     def __cmp__(self, other):
         return cmp(self.number, other.number)
 
+    def __eq__(self, other):
+        if not isinstance(other, Tid):
+            return NotImplemented
+        return self.number == other.number
+
+    def __ne__(self, other):
+        r = self.__eq__(other)
+        return r if r is NotImplemented else not r
+
     def __hash__(self):
         return hash(self.number)
 
 class Subs(Seq) :
     "a set of subroutines"
-    pass
+    __slots__ = ()
+    contains = ('Sub',)
 
 class Args(Seq) :
     "sequence of arguments"
-    pass
+    __slots__ = ()
+    contains = ('Arg',)
 class Blks(Seq) :
     "sequence of basic blocks"
-    pass
+    __slots__ = ()
+    contains = ('Blk',)
 class Phis(Seq) :
     "sequence of phi-nodes"
-    pass
+    __slots__ = ()
+    contains = ('Phi',)
 class Defs(Seq) :
     "sequence of definitions"
-    pass
+    __slots__ = ()
+    contains = ('Def',)
 class Jmps(Seq) :
     "sequence of jump terms"
-    pass
+    __slots__ = ()
+    contains = ('Jmp',)
 
 class Memmap(Seq) :
     "sequence of memory annotations "
-    pass
+    __slots__ = ()
+    contains = ('Annotation',)
 
 class Region(ADT) :
     "Region(beg,end) a pair of addresses, that denote a memory region"
+    __slots__ = ()
+    contains = ()
     @property
     def beg(self) : return self.arg[0]
 
@@ -323,6 +377,8 @@ class Region(ADT) :
 
 class Section(ADT,Sequence) :
     """A contiguous piece of memory in a process image"""
+    __slots__ = ()
+    contains = ()
 
     @property
     def name(self) :
@@ -351,19 +407,40 @@ class Section(ADT,Sequence) :
         return self.data.__len__()
 
 class Sections(ADT,Mapping) :
-    " a mapping from names to sections"
+    """ a mapping from names to sections
+
+    The sections are stored only in the list, and a name is looked up
+    with a linear scan from the end of it (the last of the sections
+    with the same name wins).
+    """
+    __slots__ = ()
+    contains = ('Section',)
+
     def __init__(self, *args):
         super(Sections, self).__init__(args)
-        self.elements = dict((x.name,x) for x in args[0])
+
+    @property
+    def elements(self):
+        "a new dictionary from section names to sections"
+        return dict((x.name,x) for x in self.arg[0])
 
     def __getitem__(self,i) :
-        return self.elements.__getitem__(i)
+        for sec in reversed(self.arg[0]):
+            if sec.name == i:
+                return sec
+        raise KeyError(i)
 
     def __len__(self) :
-        return self.elements.__len__()
+        return len(set(sec.name for sec in self.arg[0]))
 
     def __iter__(self) :
-        return self.elements.__iter__()
+        return _unique(sec.name for sec in self.arg[0])
+
+    def __eq__(self, other):
+        return _mapping_equal(self, other)
+
+    def __hash__(self):
+        return _mapping_hash(self)
 
 class Annotation(ADT) :
     """Annotation(Region(beg,end), Attr(name,value))
@@ -371,6 +448,8 @@ class Annotation(ADT) :
     Each annotation denotes an association between a memory region and
     some arbitrary property, denoted with an attribute.
     """
+    __slots__ = ()
+    contains = ('Region', 'Attr')
     @property
     def region(self):
         """memory region"""
@@ -384,6 +463,27 @@ class Annotation(ADT) :
 def parse_addr(str):
     return int(str.split(':')[0],16)
 
-def loads(s):
-    "loads bir object from string"
-    return noeval_parser.parser(s)
+def loads(s, lazy=False, processes=None, hashcons=False):
+    """loads bir object from string
+
+    If `lazy` is true, then subroutines of the program are parsed
+    only when they are accessed for the first time, e.g.,
+
+    >>> proj = loads(s, lazy=True)
+    >>> main = proj.program.subs.find('main')
+
+    If `processes` is specified, then subroutines are parsed in
+    parallel by the given number of worker processes.
+
+    If `hashcons` is true, then structurally equal BIL expressions
+    are represented by the same object, e.g.,
+
+    >>> proj = loads(s, hashcons=True)
+    >>> x, y = proj.program.subs.find('main').blks[0].defs[:2]
+    >>> x.rhs is y.rhs # if x.rhs == y.rhs
+
+    The shared expressions must not be mutated.
+    """
+    if processes is not None:
+        return noeval_parser.parallel_parser(s, processes, hashcons=hashcons)
+    return noeval_parser.parser(s, lazy=lazy, hashcons=hashcons)
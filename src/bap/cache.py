@@ -0,0 +1,219 @@
+"""Content-addressed on-disk cache of bap.run results.
+
+A result is stored under a key, that is a hash of everything that
+affects it: the contents of the analyzed file, the path to it, the
+command line arguments, the dump format and the function that parses
+it, and the bap executable (its resolved path, size and modification
+time, so bap is not run to query its version). Thus a changed binary
+or a new version of bap just miss the cache, there is no need to
+invalidate it. On a hit bap is not run at all.
+
+>>> proj = bap.run('/bin/true', cache=Cache('/tmp/bap-cache'))
+
+Projects are stored in the binary ADT format (see `bap.binfmt`), other
+results are pickled, so the cache directory shall be trusted the same
+as the code that reads it.
+
+The cache is safe to share between concurrent processes: an entry is
+written into a temporary file and then atomically renamed, and a
+reader either sees a complete entry or misses it. When the total size
+of the entries exceeds the limit the least recently used ones are
+removed (the modification time of an entry is updated on each hit).
+Temporary files count against the limit too, and those older than
+STALE_AGE seconds, left by a writer that was killed, are removed.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+try:
+    from shutil import which
+except ImportError: # python2
+    from distutils.spawn import find_executable as which
+
+from . import binfmt
+from .adt import ADT
+
+# the default limit of the cache size in bytes
+MAX_SIZE = 1 << 30
+
+SUFFIX = '.bapc'
+
+TMP_SUFFIX = '.tmp'
+
+# a temporary file older than that (in seconds) is left by a dead writer
+STALE_AGE = 3600
+
+
+class Cache(object):
+    "A directory of cached bap.run results"
+    def __init__(self, path=None, max_size=MAX_SIZE):
+        if path is None:
+            path = default_path()
+        self.path = path
+        self.max_size = max_size
+        if not os.path.isdir(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                if not os.path.isdir(path): # created by another process
+                    raise
+
+    def key(self, path, args, bap, parser):
+        """key(path, args, bap, parser) -> str
+
+        Returns the key of a result of running `bap` on the file `path`
+        with the given arguments and parser.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as inp:
+            for chunk in iter(lambda: inp.read(1 << 20), b''):
+                digest.update(chunk)
+        parts = [path, bap_identity(bap)]
+        parsers = parser if isinstance(parser, (list, tuple)) else [parser]
+        for parser in parsers:
+            parser = parser or {}
+            parts += [parser.get('format', ''), _function_name(parser.get('load'))]
+        for part in parts + list(args):
+            digest.update(b'\x00' + _encode(part))
+        return digest.hexdigest()
+
+    def get(self, key, default=None):
+        """get(key[, default]) -> result
+
+        Returns the cached result, or default if there is no entry
+        for the key or it is unreadable.
+        """
+        name = self._entry(key)
+        try:
+            with open(name, 'rb') as inp:
+                data = inp.read()
+        except (IOError, OSError):
+            return default
+        try:
+            if data.startswith(binfmt.MAGIC):
+                result = binfmt.loads(data)
+            else:
+                result = pickle.loads(data)
+        except Exception: # a stale or corrupted entry
+            _remove(name)
+            return default
+        try:
+            os.utime(name, None)
+        except OSError: # evicted by another process
+            pass
+        return result
+
+    def put(self, key, result):
+        "put(key, result) stores the result and evicts old entries"
+        if isinstance(result, ADT):
+            data = binfmt.dumps(result)
+        else:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(data)
+            _replace(tmp, self._entry(key))
+        except BaseException:
+            _remove(tmp)
+            raise
+        self.evict()
+
+    def evict(self, max_size=None):
+        """evict([max_size]) removes the least recently used entries,
+        until the total size of the cache is not greater than max_size,
+        which defaults to the cache limit.
+
+        Stale temporary files are removed, and the ones, that are
+        still being written, are counted in the total size.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.path):
+            if not name.endswith((SUFFIX, TMP_SUFFIX)):
+                continue
+            name = os.path.join(self.path, name)
+            try:
+                stat = os.stat(name)
+            except OSError:
+                continue
+            if name.endswith(TMP_SUFFIX):
+                if now - stat.st_mtime > STALE_AGE:
+                    _remove(name)
+                else:
+                    total += stat.st_size
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        for _, size, name in entries:
+            if total <= max_size:
+                break
+            _remove(name)
+            total -= size
+
+    def clear(self):
+        "removes all entries"
+        self.evict(0)
+
+    def _entry(self, key):
+        return os.path.join(self.path, key + SUFFIX)
+
+
+def default_path():
+    """default_path() -> str
+
+    Returns the default cache directory, bap-python in the user cache
+    directory ($XDG_CACHE_HOME or ~/.cache).
+    """
+    root = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(root, 'bap-python')
+
+def bap_identity(bap='bap'):
+    """bap_identity([bap]) -> str
+
+    Returns a string, that changes whenever the bap executable is
+    changed, e.g., upgraded. It consists of the resolved path of the
+    executable, its size and modification time, and is computed
+    without running bap.
+    """
+    path = which(bap) or bap
+    try:
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+    except OSError: # bap will fail to run anyway
+        return bap
+    return '{0}:{1}:{2}'.format(path, stat.st_size, stat.st_mtime)
+
+
+def _function_name(fn):
+    if fn is None:
+        return ''
+    name = getattr(fn, '__qualname__', None) or getattr(fn, '__name__', None)
+    if name is None:
+        return repr(fn)
+    return '{0}.{1}'.format(getattr(fn, '__module__', ''), name)
+
+def _encode(part):
+    if isinstance(part, bytes):
+        return part
+    return part.encode('utf-8')
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError: # python2, atomic on posix
+        os.rename(src, dst)
+
+def _remove(name):
+    try:
+        os.remove(name)
+    except OSError:
+        pass
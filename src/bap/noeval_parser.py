@@ -4,11 +4,20 @@ Parser for ADT string from bap that does not use eval
 
 The naive eval-based version runs into out-of-memory conditions on large files
 '''
+import codecs
+import contextlib
 import gc
+import multiprocessing
+import re
 import sys
 import time
 
+from array import array
 from subprocess import check_output
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 # bap.1.3 breaks the format of the following types.  it prints hexes
 # without prefixing them with the `0x` escape. To fix it without
@@ -19,6 +28,29 @@ BROKEN_TYPES = [
     'Region'
 ]
 
+# the following types are immutable leaves, that are repeated over and
+# over in a project, e.g., Imm(0x40). When sharing is enabled, the
+# parser creates only one instance for each distinct value of them.
+FLYWEIGHT_TYPES = frozenset([
+    'Imm', 'Mem',
+    'LittleEndian', 'BigEndian',
+    'Int',
+    'In', 'Out', 'Both',
+])
+
+def _exp_types():
+    '''
+    Return the names of all BIL expression constructors
+    '''
+    from .bil import Exp
+    names = set()
+    stack = [Exp]
+    while stack:
+        cls = stack.pop()
+        names.add(cls.__name__)
+        stack.extend(cls.__subclasses__())
+    return frozenset(names)
+
 # NOTE: uses bap.bir, but cannot import at module level (circular references)
 
 def toint(string, start, end, base=10):
@@ -296,6 +328,463 @@ def _parser(in_s, logger=None):
         raise ParserInputError('Incomplete input string')
     return objs[0]
 
+# a token is an integer, a constructor name together with its opening
+# parenthesis, a double-quoted string with backslash escapes, an
+# opening or closing bracket, or a comma. Leading whitespace is
+# skipped by the pattern itself, anything else is matched by the last
+# group and reported as an error.
+_TOKEN = re.compile(r"""\s*(?:
+    (\d[^\s"()\[\],]*)
+  | ([^\s"()\[\],]+)\s*(\()?
+  | ("[^"\\]*(?:\\.[^"\\]*)*")
+  | ([(\[])
+  | ([)\]])
+  | (,)
+  | (\S))""", re.DOTALL | re.VERBOSE)
+
+# indices of the token groups
+_INT, _NAME, _APP, _STR, _OPEN, _CLOSE, _COMMA = range(1, 8)
+
+def _binary(regex):
+    '''
+    Return the same regular expression for bytes-like inputs
+    '''
+    return re.compile(regex.pattern.encode('ascii'), regex.flags & ~re.UNICODE)
+
+_TOKEN_BYTES = _binary(_TOKEN)
+
+def _unescape(literal):
+    '''
+    Decode the body of a string literal the same way _parse_str does
+    '''
+    if sys.version_info > (3,):
+        return literal.encode('utf-8').decode('unicode_escape')
+    return literal.decode('string_escape')
+
+def _unescape_bytes(literal):
+    '''
+    Decode the body of a string literal from a bytes-like input, the
+    result is the same as of _unescape of the decoded literal
+    '''
+    return literal.decode('unicode_escape')
+
+class IncrementalParser(object):
+    '''
+    Token-level no-eval parser that accepts its input in chunks
+
+    Feed the input with feed() as it becomes available, and call close()
+    to finish parsing and obtain the result. Only the unfinished token
+    at the end of the last chunk and the stack of open constructors are
+    kept between the calls, so the whole input never has to be held in
+    memory.
+
+    >>> adt = IncrementalParser()
+    >>> for chunk in iter(lambda: fobj.read(1 << 16), ''):
+    ...     adt.feed(chunk)
+    >>> proj = adt.close()
+
+    Chunks may be either str or bytes-like objects (bytes, bytearray,
+    memoryview or mmap). If the first chunk is bytes-like, then the
+    input is scanned as bytes, and only string literals are decoded
+    (as UTF-8), so the input is never copied and decoded as a whole.
+    Otherwise, the bytes-like chunks are decoded as UTF-8.
+
+    If share is true, then equal strings are represented with the same
+    str object, and equal leaves of FLYWEIGHT_TYPES with the same
+    instance, that considerably reduces memory consumption. Only the
+    first occurrence of a string literal is decoded.
+
+    If hashcons is true, then structurally equal BIL expressions are
+    represented with the same instance, so the expressions form a DAG
+    rather than a tree, and equal expressions are also identical. The
+    shared expressions must not be mutated.
+
+    If lazy is true, then subroutines inside Subs(...) are not parsed,
+    instead their positions are recorded, and a subroutine is parsed
+    on the first access, see LazyTerms. The subroutines keep the input
+    alive, so in the lazy mode the whole input must be passed to a
+    single feed() call.
+
+    Produces the same objects as _parser, but consumes whole tokens
+    with a compiled regular expression instead of dispatching on every
+    character of the input.
+    '''
+    def __init__(self, logger=None, size=None, lazy=False, share=True, hashcons=False):
+        from . import bir
+        self._bir = bir
+        self._strings = {} if share else None # literal -> str
+        self._consed = FLYWEIGHT_TYPES if share or hashcons else frozenset()
+        if hashcons:
+            self._consed = self._consed | _exp_types()
+        self._leaves = {} if self._consed else None # (kind, args) -> ADT
+        self._lazy = lazy
+        self._source = None
+        self._ctors = {}
+        self._root = []
+        self._stk = [] # open frames, each is a (kind, children) pair
+        self._kind = None
+        self._children = self._root
+        self._base = 10
+        self._need_sep = False # a value was just closed, expect ',' or a closer
+        self._pending = [] # the unfinished token split over several chunks
+        self._in_str = False # the unfinished token is a string literal
+        self._offset = 0 # position of the unfinished token in the input
+        self._decoder = None
+        self._bytes = None # true if the input is scanned as bytes
+        self._names = {} # bytes -> str, for constructor names
+        self._closed = False
+        self._logger = logger
+        self._ntoks = 0
+        if logger is not None:
+            self._interval, self._progress = setup_progress(size or 1)
+
+    def feed(self, data):
+        '''
+        Parse the next chunk of the input
+        '''
+        if self._closed:
+            raise ParserError('feed() called after close()')
+        if self._lazy and self._source is not None:
+            raise ParserError('the lazy parser accepts only one chunk')
+        if self._bytes is None:
+            self._bytes = not isinstance(data, str)
+        if self._bytes:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            elif isinstance(data, memoryview) and self._lazy:
+                data = data.tobytes() # lazy terms need find()
+        elif not isinstance(data, str):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder('utf-8')()
+            data = self._decoder.decode(data)
+        if self._lazy:
+            self._source = data
+        self._pending.append(data)
+        # a long string literal is rescanned only when its end may be near
+        if not self._in_str or _has_quote(data):
+            self._scan(False)
+
+    def close(self):
+        '''
+        Finish parsing and return the parsed object
+        '''
+        if self._closed:
+            raise ParserError('close() called twice')
+        if self._decoder is not None:
+            self._pending.append(self._decoder.decode(b'', True))
+        self._scan(True)
+        self._closed = True
+        if self._kind is not None or len(self._root) != 1:
+            raise ParserInputError('Incomplete input stream')
+        return self._root[0]
+
+    def _terms(self, source, offsets):
+        '''
+        Return a sequence of subroutines at the given offsets in the source
+        '''
+        return LazyTerms(source, offsets, (self._strings, self._leaves, self._consed))
+
+    def _scan(self, final):
+        '''
+        Consume all complete tokens of the pending input
+        '''
+        binary = self._bytes
+        if len(self._pending) == 1:
+            in_s = self._pending[0]
+        else:
+            in_s = (b'' if binary else '').join(self._pending)
+        s_len = len(in_s)
+        offset = self._offset
+        ctors = self._ctors
+        strings = self._strings
+        leaves = self._leaves
+        consed = self._consed
+        stk = self._stk
+        kind, children = self._kind, self._children
+        base = self._base
+        need_sep = self._need_sep
+        logger = self._logger
+        rest = s_len
+        in_str = False
+        lazy = self._lazy
+        token = _TOKEN_BYTES if binary else _TOKEN
+        unescape = _unescape_bytes if binary else _unescape
+        if binary:
+            quote, rbracket, hexprefix, subs = b'"', b']', b'0x', b'Subs'
+        else:
+            quote, rbracket, hexprefix, subs = '"', ']', '0x', 'Subs'
+        pos = 0
+        while pos is not None:
+            start, pos = pos, None
+            for m in token.finditer(in_s, start):
+                tok = m.lastindex
+                if tok == _COMMA:
+                    if kind is None:
+                        raise ParserInputError('Mismatched input stream')
+                    need_sep = False
+                    continue
+                elif tok == _CLOSE:
+                    if kind is None:
+                        raise ParserInputError('Mismatched input stream')
+                    c = m.group(tok)
+                    if c == rbracket:
+                        if kind != '[':
+                            raise ParserInputError('close %r and open %r mismatch' % (c, kind))
+                        value = children
+                    elif kind == '[':
+                        raise ParserInputError('close %r and open %r mismatch' % (c, kind))
+                    elif kind == '(':
+                        value = tuple(children)
+                    else:
+                        ctor = ctors.get(kind)
+                        if ctor is None:
+                            ctor = ctors[kind] = getattr(self._bir, kind)
+                        if leaves is not None and kind in consed:
+                            key = (kind, tuple(children))
+                            value = leaves.get(key)
+                            if value is None:
+                                value = leaves[key] = ctor(*children)
+                        else:
+                            value = ctor(*children)
+                    kind, children = stk.pop()
+                    base = 16 if kind in BROKEN_TYPES else 10
+                    if logger is not None:
+                        self._ntoks += 1
+                        if self._ntoks & 0xfff == 0 and self._interval() > 5:
+                            progress, remaining = self._progress(offset + m.end())
+                            logger.info("progress: %0.2f%% : %10d of %d" % progress)
+                            logger.info("remaining: %02d:%02d:%02d" % remaining)
+                elif need_sep:
+                    raise ParserInputError('Expected separator at %d' % (offset + m.start(tok)))
+                elif tok == _STR:
+                    if strings is None:
+                        value = unescape(m.group(tok)[1:-1])
+                    else:
+                        c = m.group(tok)
+                        value = strings.get(c)
+                        if value is None:
+                            value = strings[c] = unescape(c[1:-1])
+                elif tok == _INT:
+                    if not final and m.end() == s_len: # may continue in the next chunk
+                        rest = m.start()
+                        break
+                    c = m.group(tok)
+                    try:
+                        value = int(c, 16 if c.startswith(hexprefix) else base)
+                    except ValueError: # the slow path handles long suffixes
+                        if binary:
+                            c = c.decode('latin-1')
+                        try:
+                            value = toint(c, 0, len(c), base)
+                        except ValueError:
+                            raise ParserInputError("Integer expected between [%d..%d)" %
+                                                   (offset + m.start(tok), offset + m.end(tok)))
+                elif tok == _APP or tok == _OPEN:
+                    if lazy and tok == _APP and m.group(_NAME) == subs:
+                        terms, pos = _scan_terms(in_s, m.end())
+                        children.append(self._bir.Subs(self._terms(in_s, terms)))
+                        need_sep = True
+                        break # restart scanning after the subroutines
+                    stk.append((kind, children))
+                    kind = m.group(_NAME) if tok == _APP else m.group(tok)
+                    if binary:
+                        kind = self._name(kind)
+                    children = []
+                    base = 16 if kind in BROKEN_TYPES else 10
+                    continue
+                elif tok == _NAME:
+                    if not final and m.end() == s_len: # the paren may be in the next chunk
+                        rest = m.start()
+                        break
+                    raise ParserInputError("Expected '(' after %r at %d" %
+                                           (m.group(tok), offset + m.end(tok)))
+                elif not final and m.group(tok) == quote: # the string is not finished yet
+                    rest = m.start()
+                    in_str = True
+                    break
+                else:
+                    raise ParserInputError('Unexpected input at %d' % (offset + m.start(tok)))
+                children.append(value)
+                need_sep = True
+        self._pending = [in_s[rest:]] if rest < s_len else []
+        self._in_str = in_str
+        self._offset = offset + rest
+        self._kind, self._children = kind, children
+        self._base = base
+        self._need_sep = need_sep
+
+    def _name(self, name):
+        '''
+        Return the str of a constructor name or a paren in the bytes mode
+        '''
+        value = self._names.get(name)
+        if value is None:
+            value = self._names[name] = name.decode('utf-8')
+        return value
+
+def _has_quote(data):
+    '''
+    Return true if the chunk of input has a double quote
+    '''
+    if isinstance(data, str):
+        return '"' in data
+    return _QUOTE_BYTES.search(data) is not None
+
+# the skeleton of a list of terms: an opening and closing bracket,
+# a start of a term up to its opening paren, and a separator
+_LIST_OPEN = re.compile(r'\s*\[')
+_LIST_CLOSE = re.compile(r'\s*\]\s*\)')
+_TERM_START = re.compile(r'\s*([^\s"()\[\],]+\s*\()')
+_TERM_SEP = re.compile(r'\s*([,\]])')
+
+# strings are skipped as a whole, since they may contain parens
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_PAREN = re.compile(r'[()]')
+
+_LIST_OPEN_BYTES = _binary(_LIST_OPEN)
+_LIST_CLOSE_BYTES = _binary(_LIST_CLOSE)
+_TERM_START_BYTES = _binary(_TERM_START)
+_TERM_SEP_BYTES = _binary(_TERM_SEP)
+_STRING_BYTES = _binary(_STRING)
+_PAREN_BYTES = _binary(_PAREN)
+_QUOTE_BYTES = re.compile(b'"')
+
+# array typecode of offsets in the input
+_OFFSET = 'q' if sys.version_info > (3,) else 'l'
+
+def _skip_term(in_s, pos):
+    '''
+    Return the position after the paren that closes the paren before pos
+
+    Parens between two string literals are counted in bulk, and only
+    a piece of the input where the depth may drop to zero is scanned
+    paren by paren.
+    '''
+    depth = 1
+    if isinstance(in_s, str):
+        lparen, rparen, dquote = '(', ')', '"'
+        paren, string = _PAREN, _STRING
+    else:
+        lparen, rparen, dquote = b'(', b')', b'"'
+        paren, string = _PAREN_BYTES, _STRING_BYTES
+    find = in_s.find
+    if hasattr(in_s, 'count'):
+        count = in_s.count
+    else: # mmap
+        count = lambda sub, start, end: in_s[start:end].count(sub)
+    while True:
+        quote = find(dquote, pos)
+        end = quote if quote >= 0 else len(in_s)
+        closes = count(rparen, pos, end)
+        if closes < depth:
+            depth += count(lparen, pos, end) - closes
+        else:
+            for m in paren.finditer(in_s, pos, end):
+                if m.group() == lparen:
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return m.end()
+        m = string.match(in_s, quote) if quote >= 0 else None
+        if m is None:
+            raise ParserInputError('Incomplete input stream')
+        pos = m.end()
+
+def _scan_terms(in_s, pos):
+    '''
+    Scan the list of terms in C([t1, .., tN]) that starts at pos right
+    after the opening paren of C, without parsing the terms.
+
+    Return the array of start and end offsets of each term and the
+    position after the closing paren of C.
+    '''
+    if isinstance(in_s, str):
+        list_open, list_close, term_start, term_sep, rbracket = \
+            _LIST_OPEN, _LIST_CLOSE, _TERM_START, _TERM_SEP, ']'
+    else:
+        list_open, list_close, term_start, term_sep, rbracket = \
+            _LIST_OPEN_BYTES, _LIST_CLOSE_BYTES, _TERM_START_BYTES, _TERM_SEP_BYTES, b']'
+    m = list_open.match(in_s, pos)
+    if m is None:
+        raise ParserInputError('Expected a list of terms at %d' % pos)
+    pos = m.end()
+    offsets = array(_OFFSET)
+    while True:
+        m = term_start.match(in_s, pos)
+        if m is None:
+            break
+        end = _skip_term(in_s, m.end())
+        offsets.append(m.start(1))
+        offsets.append(end)
+        m = term_sep.match(in_s, end)
+        if m is None:
+            raise ParserInputError('Expected separator at %d' % end)
+        pos = m.start(1)
+        if m.group(1) == rbracket:
+            break
+        pos = m.end()
+    m = list_close.match(in_s, pos)
+    if m is None:
+        raise ParserInputError('Expected the end of a list of terms at %d' % pos)
+    return offsets, m.end()
+
+class LazyTerms(Sequence):
+    '''
+    A sequence of terms that are parsed on the first access
+
+    Until a term is accessed, it costs only a pair of offsets in the
+    input, that is kept alive until all terms are parsed.
+    '''
+    def __init__(self, source, offsets, tables=(None, None, frozenset())):
+        self._source = source
+        self._tables = tables # shared with the parser, see IncrementalParser
+        self._offsets = offsets
+        self._items = [None] * (len(offsets) // 2)
+        self._missing = len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        item = self._items[i]
+        if item is None:
+            if i < 0:
+                i += len(self._items)
+            start, end = self._offsets[2*i], self._offsets[2*i+1]
+            adt = IncrementalParser(share=False)
+            adt._strings, adt._leaves, adt._consed = self._tables # pylint: disable=protected-access
+            adt.feed(self._source[start:end])
+            item = self._items[i] = adt.close()
+            self._missing -= 1
+            if self._missing == 0: # release the input
+                self._source = self._offsets = self._tables = None
+        return item
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def loaded(self):
+        '''
+        Return the number of terms that are already parsed
+        '''
+        return len(self._items) - self._missing
+
+    def __repr__(self):
+        return repr(list(self))
+
+def _scanner(in_s, logger=None, lazy=False, share=True, hashcons=False):
+    '''
+    Token-level no-eval parser implementation, see IncrementalParser
+    '''
+    adt = IncrementalParser(logger=logger, size=len(in_s), lazy=lazy, share=share,
+                            hashcons=hashcons)
+    adt.feed(in_s)
+    return adt.close()
+
 class ParserInputError(Exception):
     '''Class of exceptions for bad input to the parser'''
     pass
@@ -303,13 +792,33 @@ class ParserError(Exception):
     '''Class of exceptions for errors in the parser, not the input'''
     pass
 
-def parser(input_str, disable_gc=False, logger=None):
+# parsing engines selectable with the `engine' argument of parser()
+ENGINES = {
+    'char': _parser,
+    'token': _scanner,
+}
+
+def parser(input_str, disable_gc=False, logger=None, engine='token', lazy=False,
+           share=True, hashcons=False):
     '''
     Entrypoint to optimized adt parser.
-    Input: string (non-empty)
+    Input: string, or bytes-like object, e.g., bytes, memoryview or
+           mmap (non-empty), the 'token' engine parses the latter
+           without decoding the whole input
     Output: Python object equivalent to eval(input_str) in the context bap.bir
 
     Options: disable_gc: if true, no garbage collection is done while parsing
+             engine: name of the parsing engine from ENGINES, either
+                     'token' (default) that scans whole tokens at once, or
+                     'char' that dispatches on every character
+             lazy: if true, subroutines are parsed on the first access
+                   (only the 'token' engine supports it)
+             share: if true, equal strings and leaves of FLYWEIGHT_TYPES
+                    are represented with a single shared object (only
+                    the 'token' engine shares them)
+             hashcons: if true, structurally equal BIL expressions are
+                       represented with a single shared object (only
+                       the 'token' engine supports it)
 
     Notes: Expects a well formatted (ie. balanced) string with caveats:
         Only contains string representations of tuples, lists, integers, and
@@ -318,19 +827,153 @@ def parser(input_str, disable_gc=False, logger=None):
         Strings must start and end with double-quote and not contain a
         double-quote, not even an escaped one
     '''
-    # _parser expects a str
-    if not isinstance(input_str, str):
-        input_str = input_str.decode('utf-8')
-    if input_str == '':
+    try:
+        parse = ENGINES[engine]
+    except KeyError:
+        raise ValueError('unknown parser engine %r' % (engine,))
+    if lazy and engine != 'token':
+        raise ValueError('parser engine %r is not lazy' % (engine,))
+    if hashcons and engine != 'token':
+        raise ValueError('parser engine %r does not support hashcons' % (engine,))
+    # _parser expects a str, the token engine scans bytes as they are
+    if engine != 'token' and not isinstance(input_str, str):
+        input_str = bytes(input_str).decode('utf-8')
+    if len(input_str) == 0:
         raise ParserInputError("ADT Parser called on empty string")
     if disable_gc:
         gc.disable() # disable for better timing consistency during testing
-    result = _parser(input_str, logger=logger)
+    if engine == 'token':
+        result = parse(input_str, logger=logger, lazy=lazy, share=share,
+                       hashcons=hashcons)
+    else:
+        result = parse(input_str, logger=logger)
     if disable_gc:
         gc.enable()
     gc.collect() # force garbage collection to reclaim memory before we leave
     return result
 
+def _parse_shard(args):
+    '''
+    Parse a list of terms in a worker process
+    '''
+    text, share, hashcons = args
+    with _gc_disabled():
+        return _scanner(text, share=share, hashcons=hashcons)
+
+@contextlib.contextmanager
+def _gc_disabled():
+    '''
+    Disable garbage collection, that otherwise runs over and over again
+    while a lot of (acyclic) objects are allocated
+    '''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class _ParallelParser(IncrementalParser):
+    '''
+    Parses the skeleton of a project in the current process, and
+    subroutines in a pool of worker processes
+    '''
+    def __init__(self, pool, shards, logger=None, size=None, share=True, hashcons=False):
+        super(_ParallelParser, self).__init__(logger=logger, size=size, lazy=True,
+                                              share=share, hashcons=hashcons)
+        self._hashcons = hashcons
+        self._pool = pool
+        self._shards = shards
+
+    def _terms(self, source, offsets):
+        nterms = len(offsets) // 2
+        if nterms == 0:
+            return []
+        # split into shards of roughly equal sizes on term boundaries
+        shard_size = (offsets[-1] - offsets[0]) // self._shards + 1
+        texts = []
+        first = 0
+        for i in range(nterms):
+            last = i == nterms - 1
+            if last or offsets[2*i+1] - offsets[2*first] >= shard_size:
+                # a shard is a list literal of several terms
+                texts.append(('[' + source[offsets[2*first]:offsets[2*i+1]] + ']',
+                              self._strings is not None, self._hashcons))
+                first = i + 1
+        terms = []
+        with _gc_disabled():
+            for shard in self._pool.imap(_parse_shard, texts):
+                terms.extend(shard)
+        return terms
+
+def parallel_parser(input_str, processes=None, logger=None, share=True, hashcons=False):
+    '''
+    Parse the input like parser() does, but parse the subroutines of
+    a project in a pool of worker processes.
+
+    The skeleton of the project is scanned in the current process, and
+    the list of subroutines is split at subroutine boundaries into
+    shards, that are parsed by `processes' workers (defaults to the
+    number of CPUs) and then reassembled in the original order. The
+    result is the same as the one of parser(). Strings, leaves and
+    expressions are shared (if share or hashcons is true) only within
+    a shard.
+    '''
+    if not isinstance(input_str, str):
+        input_str = bytes(input_str).decode('utf-8')
+    if input_str == '':
+        raise ParserInputError("ADT Parser called on empty string")
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        adt = _ParallelParser(pool, processes * 4, logger=logger, size=len(input_str),
+                              share=share, hashcons=hashcons)
+        adt.feed(input_str)
+        result = adt.close()
+    finally:
+        pool.close()
+        pool.join()
+    gc.collect()
+    return result
+
+def footprint(obj):
+    '''
+    Return the number and the total size in bytes of distinct objects
+    reachable from obj (classes are not counted)
+    '''
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return len(seen), size
+
+def memory_report(input_str, hashcons=False):
+    '''
+    Parse the input with and without sharing of strings and leaves
+    (and expressions, if hashcons is true), and return a dictionary that describes the memory footprint of
+    both results and how much memory the sharing has saved:
+
+    - objects, size - number and size of objects with sharing
+    - unshared_objects, unshared_size - the same without sharing
+    - saved - bytes saved by sharing
+    - ratio - size / unshared_size
+    '''
+    report = {}
+    report['objects'], report['size'] = footprint(parser(input_str, share=True,
+                                                                hashcons=hashcons))
+    report['unshared_objects'], report['unshared_size'] = \
+        footprint(parser(input_str, share=False))
+    report['saved'] = report['unshared_size'] - report['size']
+    report['ratio'] = float(report['size']) / report['unshared_size']
+    return report
+
 EVALFREE_ADT_PARSER = {
     'format': 'adt',
     'load': parser
@@ -0,0 +1,7 @@
+'''
+Configuration of the test session
+'''
+import sys
+
+# bap.aio and its tests need asyncio and the async syntax
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 7) else []
@@ -0,0 +1,440 @@
+'''
+Test module for bap.adt and the ADT classes
+'''
+# pylint: disable=import-error
+import pickle
+
+from bap import adt, arm, asm, bil, bir
+from bap.adt import Fused
+from bap.noeval_parser import parser
+
+SUB = ('Sub(Tid(0x1, "@main"), Attrs([Attr("address","0x10:64u")]), "main", '
+       'Args([]), Blks([Blk(Tid(0x2, "%00000002"), Attrs([]), Phis([]), '
+       'Defs([Def(Tid(0x3, "%00000003"), Attrs([]), Var("RSP",Imm(0x40)), '
+       'PLUS(Var("RSP",Imm(0x40)),Int(8,64)))]), Jmps([]))]))')
+
+def adt_classes():
+    '''all ADT classes defined by the library'''
+    for mod in (adt, arm, asm, bil, bir):
+        for value in vars(mod).values():
+            if isinstance(value, type) and issubclass(value, adt.ADT):
+                yield value
+
+def test_slots():
+    # pylint: disable=missing-docstring,invalid-name
+    for cls in adt_classes():
+        assert '__slots__' in vars(cls), cls.__name__
+    sub = parser(SUB)
+    assert not hasattr(sub, '__dict__')
+    assert not hasattr(sub.blks, '__dict__')
+    assert not hasattr(sub.id, '__dict__')
+
+def test_attributes():
+    # pylint: disable=missing-docstring,invalid-name
+    sub = parser(SUB)
+    assert sub.constr == 'Sub'
+    assert sub.name == 'main'
+    assert sub.id.number == 1 and sub.id.name == '@main'
+    assert sub.attrs['address'] == '0x10:64u'
+    assert sub.blks.find('%00000002') is sub.blks[0]
+    assert sub.blks[0].defs[0].rhs.lhs.name == 'RSP'
+    assert repr(sub) == repr(parser(repr(sub)))
+
+def test_pickle():
+    # pylint: disable=missing-docstring,invalid-name
+    sub = parser(SUB)
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        copy = pickle.loads(pickle.dumps(sub, protocol))
+        assert repr(copy) == repr(sub)
+        assert copy.attrs['address'] == '0x10:64u'
+        assert copy.id.name == '@main'
+
+def test_containers():
+    # pylint: disable=missing-docstring,invalid-name
+    attrs = parser('Attrs([Attr("a","1"), Attr("b","2")])')
+    assert dict(attrs) == {'a': '1', 'b': '2'}
+    assert [(x.constr, x.name, x.value) for x in attrs.arg[0]] == \
+        [('Attr', 'a', '1'), ('Attr', 'b', '2')]
+    assert repr(attrs) == repr(bir.Attrs([bir.Attr('a', '1'), bir.Attr('b', '2')]))
+    blks = parser(SUB).blks
+    assert blks.arg == (blks.elements,)
+    tid = bir.Tid(1)
+    values = bir.Values([(tid, bil.Int(0, 8))])
+    assert values[tid] is values.arg[0][0][1]
+    sections = parser('Sections([Section(".text", 0x10, "ab")])')
+    assert sections['.text'].beg == 0x10
+    assert sections.arg[0] == [sections['.text']]
+
+def test_duplicate_keys():
+    # pylint: disable=missing-docstring,invalid-name
+    from bap import binfmt
+    text = ('Sections([Section(".a", 0x10, "ab"), Section(".a", 0x20, "cd")])',
+            'Attrs([Attr("a","1"), Attr("b","2"), Attr("a","3")])')
+    for value in (parser(x) for x in text):
+        for copy in (parser(adt.dumps(value)),
+                     binfmt.loads(binfmt.dumps(value)),
+                     pickle.loads(pickle.dumps(value))):
+            assert copy == value
+            assert len(copy.arg[0]) == len(value.arg[0])
+    sections, attrs = (parser(x) for x in text)
+    assert len(sections.arg[0]) == 2 and sections['.a'].beg == 0x20
+    assert [x.value for x in attrs.arg[0]] == ['1', '2', '3']
+    assert dict(attrs) == {'a': '3', 'b': '2'}
+    assert list(attrs) == ['a', 'b'] and len(attrs) == 2
+    assert list(sections) == ['.a'] and len(sections) == 1
+    assert 'c' not in attrs and 'a' in attrs
+    tid = bir.Tid(1)
+    values = bir.Values([(tid, bil.Int(0, 8)), (tid, bil.Int(1, 8))])
+    assert len(values.arg[0]) == 2 and values[tid] == bil.Int(1, 8)
+
+class Trace(adt.Visitor):
+    '''records the order of handler calls'''
+    def __init__(self):
+        self.calls = []
+
+    def enter_Exp(self, exp):
+        self.calls.append(('enter_Exp', exp.constr))
+
+    def enter_BinOp(self, exp):
+        self.calls.append(('enter_BinOp', exp.constr))
+
+    def visit_PLUS(self, exp):
+        self.calls.append(('visit_PLUS', exp.constr))
+        return self.visit_ADT(exp)
+
+    def leave_Var(self, exp):
+        self.calls.append(('leave_Var', exp.constr))
+
+    def enter_Int(self, exp):
+        if exp.value == 8:
+            return exp
+
+def test_visitor_dispatch():
+    # pylint: disable=missing-docstring,invalid-name
+    exp = parser('PLUS(Var("RSP",Imm(0x40)),Int(8,64))')
+    for _ in range(2): # the second run uses the cached handlers
+        trace = Trace()
+        assert trace.run(exp) is exp.rhs
+        assert trace.calls == [
+            ('enter_BinOp', 'PLUS'), ('enter_Exp', 'PLUS'), ('visit_PLUS', 'PLUS'),
+            ('enter_Exp', 'Var'), ('leave_Var', 'Var'),
+        ] # enter_Int short-circuits before enter_Exp
+
+class Find(adt.Visitor):
+    '''returns the given result at the first Int'''
+    def __init__(self, result):
+        self.result = result
+        self.left = []
+
+    def enter_Int(self, _):
+        return self.result
+
+    def leave_ADT(self, exp):
+        self.left.append(exp.constr)
+
+def test_visitor_short_circuit():
+    # pylint: disable=missing-docstring,invalid-name
+    exp = parser('PLUS(NEG(Int(1,8)),Var("x",Imm(8)))')
+    # a truthy result stops the traversal and skips leave handlers
+    find = Find('found')
+    assert find.run(exp) == 'found'
+    assert find.left == []
+    # a falsy result stops only the traversal of a single argument
+    find = Find(0)
+    assert find.run(exp) is None
+    assert find.left == ['Imm', 'Var', 'PLUS']
+
+class Ints(adt.Visitor):
+    '''counts Int nodes'''
+    def __init__(self):
+        self.count = 0
+
+    def enter_Int(self, _):
+        self.count += 1
+
+class NoInts(Ints):
+    '''disables the inherited handler'''
+    enter_Int = None
+
+def test_visitor_overrides():
+    # pylint: disable=missing-docstring,invalid-name
+    exp = parser('PLUS(Int(1,8),Int(2,8))')
+    for _ in range(2): # the second run uses the cached handlers
+        ints, no_ints = Ints(), NoInts()
+        ints.run(exp)
+        no_ints.run(exp)
+        assert ints.count == 2 and no_ints.count == 0
+    # handlers assigned to the instance take precedence
+    find = Find(None)
+    find.enter_Int = lambda _: 'stop'
+    assert find.run(exp) == 'stop'
+    ints = Ints()
+    ints.enter_Int = None
+    ints.run(exp)
+    assert ints.count == 0
+    assert Find(None).run(exp) is None
+    find, ints = Find(None), Ints()
+    find.enter_Int = lambda _: 'stop'
+    assert Fused([find, NoInts(), ints]).run(exp) == ['stop', None, None]
+    assert ints.count == 2
+
+def test_visitor_deep():
+    # pylint: disable=missing-docstring,invalid-name
+    n = 100000
+    exp = parser('Concat(' * n + 'Int(1,8)' + ',Int(2,8))' * n)
+    find = Find(None)
+    assert find.run(exp) is None
+    assert len(find.left) == 2 * n + 1
+    assert Find(True).run(exp) is True
+
+PROJECT = ('Project(Attrs([]), Sections([Section(".text", 0x10, "ab")]), '
+           'Memmap([Annotation(Region(0x10,0x11), Attr("section","\\".text\\""))]), '
+           'Program(Tid(0x0, "%00000000"), Attrs([]), Subs([{0}, {0}])))'.format(SUB))
+
+class Collect(adt.Visitor):
+    '''collects visited nodes of the given class'''
+    cls = adt.ADT
+
+    def __init__(self):
+        self.found = []
+
+    def enter_ADT(self, node):
+        if isinstance(node, self.cls):
+            self.found.append(node)
+
+class Regions(adt.Visitor):
+    '''collects memory regions'''
+    def __init__(self):
+        self.found = []
+
+    def enter_Region(self, node):
+        self.found.append(node)
+
+class Vars(adt.Visitor):
+    '''collects variables'''
+    def __init__(self):
+        self.found = []
+
+    def enter_Var(self, node):
+        self.found.append(node)
+
+def test_visitor_pruning():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    for cls, pruned in ((bir.Region, Regions), (bil.Var, Vars)):
+        collect = type('Collect' + cls.__name__, (Collect,), {'cls': cls})()
+        collect.run(proj)
+        visitor = pruned()
+        visitor.run(proj)
+        assert visitor.found == collect.found and visitor.found
+    # the regions are found without loading subroutines
+    proj = parser(PROJECT, lazy=True)
+    visitor = Regions()
+    visitor.run(proj)
+    assert len(visitor.found) == 1
+    assert proj.program.subs.elements.loaded() == 0
+
+def test_visitor_pruning_new_class():
+    # pylint: disable=missing-docstring,invalid-name
+    class Secret(bil.Exp): # pylint: disable=unused-variable
+        __slots__ = ()
+        contains = ()
+
+    class FindSecret(adt.Visitor):
+        def enter_Secret(self, exp):
+            return exp
+
+    exp = bil.PLUS(bil.Int(1, 8), Secret())
+    assert FindSecret().run(bir.Def(bir.Tid(1), bir.Attrs([]), bil.Var('x', bil.Imm(8)), exp)) \
+        is exp.rhs
+
+class CountExps(adt.Visitor):
+    '''counts expressions, except those under NEG'''
+    def __init__(self):
+        self.count = 0
+
+    def enter_Exp(self, _):
+        self.count += 1
+
+    def visit_NEG(self, _):
+        pass
+
+def test_fused():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    exp = parser('PLUS(NEG(Int(1,8)),Concat(Var("x",Imm(8)),Int(2,8)))')
+    for root in (proj, exp, proj.program.subs[0].blks):
+        for make in (lambda: Find('found'), lambda: Find(0), Trace, Regions, Vars, CountExps):
+            alone = [make(), make()]
+            expected = [v.run(root) for v in alone]
+            fused = Fused([make(), Regions(), make(), CountExps()], timed=True)
+            results = fused.run(root)
+            assert results[0::2] == expected
+            for v, w in zip(fused.visitors[0::2], alone):
+                assert vars(v) == vars(w)
+            count = CountExps()
+            count.run(root)
+            assert fused.visitors[3].count == count.count
+            assert all(t >= 0 for t in fused.timings)
+            assert 'CountExps' in fused.report()
+
+class Rename(adt.Transformer):
+    '''renames variables'''
+    def __init__(self, names):
+        self.names = names
+
+    def map_Var(self, var):
+        name = self.names.get(var.name)
+        return var if name is None else bil.Var(name, var.type)
+
+class Fold(adt.Transformer):
+    '''folds additions of constants'''
+    def map_PLUS(self, exp):
+        if isinstance(exp.lhs, bil.Int) and isinstance(exp.rhs, bil.Int):
+            return bil.Int(exp.lhs.value + exp.rhs.value, exp.lhs.size)
+        return exp
+
+def test_transformer():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    text = repr(proj)
+    assert Rename({}).run(proj) is proj
+    assert Rename({'RBP': 'FP'}).run(proj) is proj
+    renamed = Rename({'RSP': 'SP'}).run(proj)
+    assert repr(proj) == text
+    assert repr(renamed) == text.replace('"RSP"', '"SP"')
+    # only the paths to the changed nodes are copied
+    assert renamed.attrs is proj.attrs and renamed.sections is proj.sections
+    sub, old = renamed.program.subs[0], proj.program.subs[0]
+    assert sub is not old and sub.id is old.id and sub.attrs is old.attrs
+    assert sub.blks[0].defs[0].attrs is old.blks[0].defs[0].attrs
+    assert sub.blks[0].jmps is old.blks[0].jmps
+    exp = parser('PLUS(PLUS(Int(1,8),Int(2,8)),Var("x",Imm(8)))')
+    folded = Fold().run(exp)
+    assert repr(folded) == repr(parser('PLUS(Int(3,8),Var("x",Imm(8)))'))
+    assert folded.rhs is exp.rhs
+    assert Fold().run(parser('PLUS(PLUS(Int(1,8),Int(2,8)),Int(3,8))')).value == 6
+
+def test_transformer_deep():
+    # pylint: disable=missing-docstring,invalid-name
+    n = 100000
+    exp = parser('Concat(' * n + 'Var("x",Imm(8))' + ',Int(2,8))' * n)
+    renamed = Rename({'x': 'y'}).run(exp)
+    for _ in range(n):
+        assert renamed.rhs is exp.rhs
+        renamed, exp = renamed.lhs, exp.lhs
+    assert renamed.name == 'y' and exp.name == 'x'
+
+def test_transformer_lazy():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT, lazy=True)
+    assert Rename({'RBP': 'FP'}).run(proj) is proj
+    renamed = Rename({'RSP': 'SP'}).run(proj)
+    assert repr(renamed) == repr(parser(PROJECT)).replace('"RSP"', '"SP"')
+
+def test_walk():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    collect = Collect()
+    collect.run(proj)
+    nodes = list(adt.walk(proj))
+    assert nodes[0] is proj
+    assert set(map(repr, collect.found)) <= set(map(repr, nodes))
+    rsp = list(adt.walk(proj, bil.Var, lambda v: v.name == 'RSP', path=True))
+    assert len(rsp) == 4
+    for var, parents in rsp:
+        assert var.name == 'RSP'
+        assert parents[0] is proj and isinstance(parents[-1], (bir.Def, bil.PLUS))
+        assert isinstance(parents[-2] if isinstance(parents[-1], bil.PLUS) else parents[-1],
+                          bir.Def)
+    assert [x.constr for x in adt.walk(proj, (bil.Int, bir.Region))] == ['Region', 'Int', 'Int']
+    # walking is lazy
+    proj = parser(PROJECT, lazy=True)
+    region = next(adt.walk(proj, bir.Region))
+    assert region.beg == 0x10
+    assert proj.program.subs.elements.loaded() == 0
+    assert next(adt.walk(proj, bir.Sub)).name == 'main'
+    assert proj.program.subs.elements.loaded() == 1
+
+def test_walk_deep():
+    # pylint: disable=missing-docstring,invalid-name
+    n = 100000
+    exp = parser('Concat(' * n + 'Var("x",Imm(8))' + ',Int(2,8))' * n)
+    (var, parents), = adt.walk(exp, bil.Var, path=True)
+    assert var.name == 'x' and len(parents) == n
+
+def test_equality():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    assert proj == parser(PROJECT) and not proj != parser(PROJECT)
+    assert proj == parser(PROJECT, lazy=True)
+    assert hash(proj) == hash(parser(PROJECT)) == hash(parser(PROJECT, lazy=True))
+    assert proj != Rename({'RSP': 'SP'}).run(proj)
+    assert proj != parser(PROJECT.replace('0x10:64u', '0x11:64u'))
+    assert bil.Int(1, 8) != bil.Int(1, 16) and bil.Int(1, 8) != 1
+    assert bil.Imm(8) != bil.Mem(8, 8) and bil.Imm(8) == bil.Imm(8)
+    # tids are equal if their numbers are
+    assert bir.Tid(1, '%1') == bir.Tid(1, '%2') != bir.Tid(2, '%1')
+    assert bir.Tid(1, '%1') in set([bir.Tid(1)])
+    exps = parser('[PLUS(Var("RSP",Imm(0x40)),Int(8,64)), Var("RSP",Imm(0x40)), '
+                  'PLUS(Var("RSP",Imm(0x40)),Int(8,64))]')
+    assert len(set(exps)) == 2
+    assert {exps[0]: 1}[exps[2]] == 1
+
+def test_mapping_equality():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    attrs = parser('Attrs([Attr("a","1"), Attr("b","2")])')
+    reordered = parser('Attrs([Attr("b","2"), Attr("a","1")])')
+    assert attrs == {'a': '1', 'b': '2'} and not attrs != {'a': '1', 'b': '2'}
+    assert attrs == reordered and hash(attrs) == hash(reordered)
+    assert attrs != {'a': '1'} and attrs != parser('Attrs([Attr("a","1"), Attr("b","3")])')
+    assert attrs != [('a', '1'), ('b', '2')]
+    assert proj.sections == dict(proj.sections) == proj.sections.elements
+    sub = parser(SUB)
+    assert sub == parser(SUB.replace('Attrs([Attr("address","0x10:64u")])',
+                                     'Attrs([Attr("address","0x10:64u"), Attr("address","0x10:64u")])'))
+    assert hash(sub) == hash(parser(SUB))
+
+def test_equality_deep():
+    # pylint: disable=missing-docstring,invalid-name
+    n = 20000
+    text = 'Concat(' * n + 'Var("x",Imm(8))' + ',Int(2,8))' * n
+    x, y = parser(text), parser(text)
+    assert x == y and hash(x) == hash(y)
+    assert x != parser(text.replace('"x"', '"y"'))
+
+def test_dump():
+    # pylint: disable=missing-docstring,invalid-name
+    for proj in (parser(PROJECT), parser(PROJECT, lazy=True)):
+        text = adt.dumps(proj)
+        assert parser(text) == proj
+    call = parser('Call(Tid(0x5, "%5"), Attrs([]), Int(1,1), (Direct(Tid(0x1, "@f")), '
+                  'Indirect(Var("LR",Imm(0x20)))))')
+    assert parser(adt.dumps(call)) == call
+    phi = bir.Phi(bir.Tid(1), bir.Attrs([]), bil.Var('x', bil.Imm(8)),
+                  bir.Values([(bir.Tid(2), bil.Int(1, 8)), (bir.Tid(3), bil.Int(2, 8))]))
+    assert repr(parser(adt.dumps(phi))) == repr(phi)
+    for s in ('', 'a "quoted" \\ string', 'line\nbreak\t\x00\x90', u'ж'):
+        attr = bir.Attr('name', s)
+        assert parser(adt.dumps(attr)).value == s
+    assert adt.dumps(bil.Int(0, 0x40)) == 'Int(0x0, 0x40)'
+    for bad in (bil.Int(-1, 8), bil.Int(1.0, 8), bil.Var('x', None)):
+        try:
+            adt.dumps(bad)
+            assert False, 'expected an error'
+        except (TypeError, ValueError):
+            pass
+
+def test_dump_chunks():
+    # pylint: disable=missing-docstring,invalid-name
+    n = 100000
+    exp = parser('Concat(' * n + 'Var("x",Imm(8))' + ',Int(2,8))' * n)
+    chunks = []
+    class Out(object): # pylint: disable=too-few-public-methods
+        def write(self, s):
+            chunks.append(s)
+    adt.dump(exp, Out(), bufsize=1000)
+    assert len(chunks) > 100 and max(map(len, chunks)) < 2000
+    assert ''.join(chunks).startswith('Concat(Concat(')
+    assert parser(''.join(chunks)) == exp
@@ -0,0 +1,90 @@
+'''
+Test module for bap.run_async using a fake bap executable
+'''
+# pylint: disable=import-error
+import asyncio
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+import bap
+from bap.bap import Failed, MalformedOutput, OutOfMemory, Timeout
+from test_bap_run import PROJECT, fake_bap
+
+@pytest.mark.parametrize('executor', [False, True])
+def test_run_async(tmpdir, executor):
+    # pylint: disable=missing-docstring,invalid-name
+    async def main(executor):
+        limit = asyncio.Semaphore(2)
+        return await asyncio.gather(*[
+            bap.run_async('test.out', bap=fake_bap(tmpdir), executor=executor,
+                          semaphore=limit)
+            for _ in range(3)])
+    if executor:
+        with ProcessPoolExecutor(1) as pool:
+            projs = asyncio.run(main(pool))
+    else:
+        projs = asyncio.run(main(None))
+    assert projs == [bap.bir.loads(PROJECT)] * 3
+
+@pytest.mark.parametrize('executor', [False, True])
+def test_run_async_formats(tmpdir, monkeypatch, executor):
+    # pylint: disable=missing-docstring,invalid-name
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir.mkdir('tmp')))
+    parsers = [bap.bap.adt_project_parser, {'format': 'bir'}]
+    expected = {'adt': bap.bir.loads(PROJECT), 'bir': PROJECT.encode()}
+    if executor:
+        with ProcessPoolExecutor(1) as pool:
+            out = asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir),
+                                            parser=parsers, executor=pool))
+    else:
+        out = asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir), parser=parsers))
+    assert out == expected
+    with pytest.raises(Failed):
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir, code=2), parser=parsers))
+    with pytest.raises(Timeout):
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir, sleep=30),
+                                  parser=parsers, timeout=0.5))
+    assert not tmpdir.join('tmp').listdir()
+    with pytest.raises(ValueError):
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir),
+                                  parser=[{'format': 'adt'}] * 2))
+
+def test_run_async_errors(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    with pytest.raises(Failed) as exn:
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir, ['(('], code=2)))
+    assert exn.value.err == b'a warning\n'
+    def load(out):
+        raise SyntaxError('bad output')
+    with pytest.raises(MalformedOutput):
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir), parser={'load': load}))
+
+def test_run_async_timeout(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    start = time.time()
+    with pytest.raises(Timeout) as exn:
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir, sleep=30), timeout=0.5))
+    assert time.time() - start < 10
+    assert exn.value.timeout == 0.5
+    assert exn.value.err == b'a warning\n'
+
+    async def cancel():
+        task = asyncio.ensure_future(bap.run_async('test.out', bap=fake_bap(tmpdir, sleep=30)))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await task
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+    assert time.time() - start < 20
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='needs RLIMIT_AS')
+def test_run_async_memory_limit(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    limit = 1 << 30
+    with pytest.raises(OutOfMemory):
+        asyncio.run(bap.run_async('test.out', bap=fake_bap(tmpdir, alloc=4 * limit),
+                                  memory_limit=limit))
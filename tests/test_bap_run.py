@@ -0,0 +1,236 @@
+'''
+Test module for bap.run using a fake bap executable
+'''
+# pylint: disable=import-error
+import mmap
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+import bap
+from bap.bap import Failed, Killed, MalformedOutput, OutOfMemory, Timeout, WorkerLost
+from bap.cache import Cache, SUFFIX, TMP_SUFFIX
+
+PROJECT = ('Project(Attrs([Attr("filename","\\"test.out\\"")]), Sections([]), '
+           'Memmap([]), Program(Tid(0x1, "%00000001"), Attrs([]), Subs([])))')
+
+FAKE_BAP = '''#!{python}
+import os, sys, time
+with open(os.path.join(os.path.dirname(sys.argv[0]), 'calls'), 'a') as log:
+    log.write(' '.join(sys.argv[1:]) + '\\n')
+if '--version' in sys.argv:
+    sys.exit(1)
+sys.stderr.write("a warning\\n")
+sys.stderr.flush()
+time.sleep({sleep!r})
+memory = bytearray({alloc!r})
+outs = [open(arg.split(':', 1)[1], 'w') for arg in sys.argv
+        if arg.startswith('-d') and ':' in arg] or [sys.stdout]
+for chunk in {chunks!r}:
+    for out in outs:
+        out.write(chunk)
+        out.flush()
+if {signal!r}:
+    os.kill(os.getpid(), {signal!r})
+sys.exit({code!r})
+'''
+
+def fake_bap(tmpdir, chunks=(PROJECT,), code=0, signal=0, sleep=0, alloc=0):
+    '''
+    create an executable that prints chunks and exits with code
+    '''
+    path = tmpdir.join('bap')
+    path.write(FAKE_BAP.format(python=sys.executable, chunks=list(chunks),
+                               code=code, signal=signal, sleep=sleep, alloc=alloc))
+    path.chmod(path.stat().mode | stat.S_IEXEC)
+    return str(path)
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_run(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    chunks = [PROJECT[i:i+10] for i in range(0, len(PROJECT), 10)]
+    proj = bap.run('test.out', bap=fake_bap(tmpdir, chunks), stream=stream)
+    assert proj.attrs['filename'] == '"test.out"'
+    assert repr(proj) == repr(bap.bir.loads(PROJECT))
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_no_parser(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    out = bap.run('test.out', bap=fake_bap(tmpdir, ['a', 'b']), parser=None, stream=stream)
+    assert out == b'ab'
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_failed(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    with pytest.raises(Failed) as exn:
+        bap.run('test.out', bap=fake_bap(tmpdir, ['(('], code=2), stream=stream)
+    assert exn.value.code == 2
+    assert exn.value.err == b'a warning\n'
+
+@pytest.mark.skipif(not hasattr(os, 'kill'), reason='no signals')
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_killed(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    with pytest.raises(Killed) as exn:
+        bap.run('test.out', bap=fake_bap(tmpdir, signal=9), stream=stream)
+    assert exn.value.signal == 9
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_malformed(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    def load(out):
+        raise SyntaxError('bad output')
+    with pytest.raises(MalformedOutput):
+        bap.run('test.out', bap=fake_bap(tmpdir), parser={'load': load}, stream=stream)
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_timeout(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    start = time.time()
+    with pytest.raises(Timeout) as exn:
+        bap.run('test.out', bap=fake_bap(tmpdir, sleep=30), stream=stream, timeout=0.5)
+    assert time.time() - start < 10
+    assert exn.value.timeout == 0.5
+    assert exn.value.err == b'a warning\n'
+    proj = bap.run('test.out', bap=fake_bap(tmpdir), stream=stream, timeout=30)
+    assert proj == bap.bir.loads(PROJECT)
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='needs RLIMIT_AS')
+@pytest.mark.parametrize('stream', [False, True])
+def test_run_memory_limit(tmpdir, stream):
+    # pylint: disable=missing-docstring,invalid-name
+    limit = 1 << 30
+    with pytest.raises(OutOfMemory) as exn:
+        bap.run('test.out', bap=fake_bap(tmpdir, alloc=4 * limit), stream=stream,
+                memory_limit=limit)
+    assert exn.value.limit == limit
+    assert exn.value.err.startswith(b'a warning\n')
+    proj = bap.run('test.out', bap=fake_bap(tmpdir), stream=stream, memory_limit=limit)
+    assert proj == bap.bir.loads(PROJECT)
+
+def test_run_via_file(tmpdir, monkeypatch):
+    # pylint: disable=missing-docstring,invalid-name
+    monkeypatch.setattr(bap.bap, 'FILE_CHUNK_SIZE', 10)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir.mkdir('tmp')))
+    chunks = [PROJECT[i:i+10] for i in range(0, len(PROJECT), 10)]
+    proj = bap.run('test.out', bap=fake_bap(tmpdir, chunks), via_file=True)
+    assert proj == bap.bir.loads(PROJECT)
+    inputs = []
+    def load(data):
+        inputs.append(type(data))
+        return bap.bir.loads(data)
+    parser = {'format': 'adt', 'load': load}
+    proj = bap.run('test.out', bap=fake_bap(tmpdir), parser=parser, via_file=True)
+    assert proj == bap.bir.loads(PROJECT)
+    assert inputs == [mmap.mmap] # parsed from the map without a copy
+    with pytest.raises(Failed) as exn:
+        bap.run('test.out', bap=fake_bap(tmpdir, code=2), via_file=True)
+    assert exn.value.err == b'a warning\n'
+    assert not tmpdir.join('tmp').listdir()
+
+def test_run_formats(tmpdir, monkeypatch):
+    # pylint: disable=missing-docstring,invalid-name
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir.mkdir('tmp')))
+    parsers = [bap.bap.adt_project_parser, {'format': 'bir'}]
+    out = bap.run('test.out', bap=fake_bap(tmpdir), parser=parsers)
+    assert out == {'adt': bap.bir.loads(PROJECT), 'bir': PROJECT.encode()}
+    with pytest.raises(Failed):
+        bap.run('test.out', bap=fake_bap(tmpdir, code=2), parser=parsers)
+    assert not tmpdir.join('tmp').listdir()
+    with pytest.raises(ValueError):
+        bap.run('test.out', bap=fake_bap(tmpdir), parser=[{'format': 'adt'}] * 2)
+
+def test_run_cached(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    binary = tmpdir.join('test.out')
+    binary.write('\x7fELF')
+    cache = Cache(str(tmpdir.join('cache')))
+    fake = fake_bap(tmpdir)
+    proj = bap.run(str(binary), bap=fake, cache=cache)
+    assert proj == bap.bir.loads(PROJECT)
+    calls = tmpdir.join('calls').read()
+    assert bap.run(str(binary), bap=fake, cache=cache) == proj
+    assert bap.run(str(binary), bap=fake, cache=cache.path) == proj
+    # a hit in a fresh process doesn't run bap either
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(bap.__file__)))
+    subprocess.check_call([sys.executable, '-c', 'import bap, sys; '
+                           'bap.run(sys.argv[1], bap=sys.argv[2], cache=sys.argv[3])',
+                           str(binary), fake, cache.path], env=env)
+    assert tmpdir.join('calls').read() == calls
+    def misses(*args):
+        before = tmpdir.join('calls').read()
+        bap.run(*args, bap=fake, cache=cache)
+        return tmpdir.join('calls').read() != before
+    assert not misses(str(binary))
+    assert misses(str(binary), ['--no-cache']) # different arguments
+    binary.write('\x7fELF\x02') # different contents
+    assert misses(str(binary))
+    os.utime(fake, (0, 0)) # a changed bap
+    assert misses(str(binary))
+    assert not misses(str(binary))
+
+def test_cache_eviction(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    cache = Cache(str(tmpdir), max_size=100)
+    cache.put('a', b'x' * 60)
+    os.utime(os.path.join(cache.path, 'a' + SUFFIX), (0, 0))
+    cache.put('b', b'y' * 60)
+    assert cache.get('a') is None
+    assert cache.get('b') == b'y' * 60
+    tmpdir.join('b' + SUFFIX).write('garbage')
+    assert cache.get('b', 'miss') == 'miss'
+    cache.max_size = 1000
+    cache.put('c', bap.bir.loads(PROJECT))
+    assert cache.get('c') == bap.bir.loads(PROJECT)
+    cache.clear()
+    assert cache.get('c') is None
+    assert not os.listdir(cache.path)
+
+def test_cache_temporary_files(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    cache = Cache(str(tmpdir), max_size=100)
+    stale, fresh = tmpdir.join('stale' + TMP_SUFFIX), tmpdir.join('fresh' + TMP_SUFFIX)
+    stale.write('x' * 1000)
+    os.utime(str(stale), (0, 0))
+    fresh.write('x' * 50)
+    cache.put('a', b'x' * 60) # the fresh file counts, so the entry is evicted
+    assert not stale.check() and fresh.check()
+    assert cache.get('a') is None
+    cache.put('b', b'x' * 20)
+    assert cache.get('b') == b'x' * 20
+
+def test_run_many(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    paths = ['a.out', 'b.out', 'c.out', 'a.out']
+    results = list(bap.run_many(paths, bap=fake_bap(tmpdir), processes=2,
+                                memory_limit=1, estimate=len))
+    assert sorted(path for path, _ in results) == sorted(paths)
+    for _, proj in results:
+        assert proj == bap.bir.loads(PROJECT)
+    results = list(bap.run_many(paths[:2], bap=fake_bap(tmpdir, code=2)))
+    assert len(results) == 2
+    for _, exn in results:
+        assert isinstance(exn, Failed) and exn.code == 2
+    out = dict(bap.run_many(['x'], bap=fake_bap(tmpdir, ['ab']), parser=None))
+    assert out == {'x': b'ab'}
+
+def die(_):
+    '''
+    a load function, that kills its worker
+    '''
+    os._exit(3) # pylint: disable=protected-access
+
+def test_run_many_lost(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    parser = {'format': 'adt', 'load': die}
+    results = dict(bap.run_many(['a.out'], bap=fake_bap(tmpdir), parser=parser))
+    assert isinstance(results['a.out'], WorkerLost)
+    assert results['a.out'].exitcode == 3
+    results = list(bap.run_many(['a.out', 'b.out', 'c.out'], bap=fake_bap(tmpdir),
+                                parser=parser, processes=2))
+    assert len(results) == 3
+    assert all(isinstance(exn, WorkerLost) for _, exn in results)
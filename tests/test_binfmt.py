@@ -0,0 +1,70 @@
+'''
+Test module for bap.binfmt
+'''
+# pylint: disable=import-error
+import io
+import struct
+
+import pytest
+
+from bap import binfmt, bir
+from bap.noeval_parser import parser
+from test_adt import PROJECT
+
+def test_roundtrip():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT)
+    data = binfmt.dumps(proj)
+    assert data.startswith(binfmt.MAGIC)
+    copy = binfmt.loads(data)
+    assert isinstance(copy, bir.Project)
+    assert copy == proj
+    assert repr(copy) == repr(proj)
+    out = io.BytesIO()
+    binfmt.dump(proj, out)
+    out.seek(0)
+    assert binfmt.load(out) == proj
+
+def test_roundtrip_lazy():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT, lazy=True)
+    assert binfmt.loads(binfmt.dumps(proj)) == parser(PROJECT)
+
+def test_sharing():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser(PROJECT, hashcons=True)
+    f, g = proj.program.subs
+    assert f.blks[0].defs[0].rhs is g.blks[0].defs[0].rhs
+    copy = binfmt.loads(binfmt.dumps(proj))
+    assert copy == proj
+    f, g = copy.program.subs
+    assert f.blks[0].defs[0].rhs is g.blks[0].defs[0].rhs
+    assert f.blks[0].defs[0].rhs.lhs is f.blks[0].defs[0].lhs
+
+def test_errors():
+    # pylint: disable=missing-docstring,invalid-name
+    data = binfmt.dumps(parser(PROJECT))
+    with pytest.raises(binfmt.FormatError):
+        binfmt.loads(b'BAP')
+    with pytest.raises(binfmt.FormatError):
+        binfmt.loads(b'NOTADT\x00' + data[len(binfmt.MAGIC):])
+    with pytest.raises(binfmt.FormatError):
+        binfmt.loads(data[:-10])
+    newer = data[:len(binfmt.MAGIC)] + struct.pack('>H', binfmt.VERSION + 1)
+    with pytest.raises(binfmt.VersionError) as exn:
+        binfmt.loads(newer + data[len(newer):])
+    assert exn.value.version == binfmt.VERSION + 1
+
+
+def test_python_version():
+    # pylint: disable=missing-docstring,invalid-name
+    data = binfmt.dumps(parser(PROJECT))
+    start = len(binfmt.MAGIC) + 2
+    assert struct.unpack('>BBB', data[start:start + 3]) == binfmt.STAMP[1:]
+    for i, field in enumerate(binfmt.STAMP[1:]):
+        stale = bytearray(data)
+        stale[start + i] = field + 1
+        with pytest.raises(binfmt.VersionError) as exn:
+            binfmt.loads(bytes(stale))
+        assert exn.value.version == binfmt.VERSION
+        assert exn.value.stamp != binfmt.STAMP
@@ -2,10 +2,12 @@
 Test module for bap.noeval_parser
 '''
 # pylint: disable=import-error
+import mmap
 import sys
 import logging
 import bap
 from bap.noeval_parser import parser, EVALFREE_ADT_PARSER, ParserInputError, ParserError
+from bap.noeval_parser import IncrementalParser, parallel_parser, memory_report
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__) # pylint: disable=invalid-name
@@ -208,6 +210,172 @@ def test_parser_badinput_8():
     with pytest.raises(ParserInputError):
         lparser('[)')
 
+SAMPLE_PROJECT = (
+    'Project(Attrs([Attr("filename","\\"test.out\\""), Attr("arch","x86_64")]), '
+    'Sections([Section(".text", 400000, "\\x55\\x48\\x89\\xe5")]), '
+    'Memmap([Annotation(Region(400000,400003), Attr("section","\\".text\\""))]), '
+    'Program(Tid(0x1, "%00000001"), Attrs([]), Subs([Sub(Tid(0x2, "@main"), '
+    'Attrs([Attr("address","0x400000:64u")]), "main", Args([]), '
+    'Blks([Blk(Tid(0x3, "%00000003"), Attrs([]), Phis([]), '
+    'Defs([Def(Tid(0x4, "%00000004"), Attrs([Attr("insn","push %rbp")]), '
+    'Var("RSP",Imm(0x40)), MINUS(Var("RSP",Imm(0x40)),Int(0x8,0x40)))]), '
+    'Jmps([Goto(Tid(0x5, "%00000005"), Attrs([]), Int(0x1,0x1), '
+    'Direct(Tid(0x3, "%00000003")))]))]))])))')
+
+def test_engines_agree():
+    # pylint: disable=missing-docstring,invalid-name
+    inputs = ['()', '(())', '((),)', '([1],)', '("abc")', r'"\""',
+              '"\\\\"', '(1,,2)', '[0x10, 12L]', ' (\n1 ,\t"a b" ) ',
+              'Region(10,0x20)', SAMPLE_PROJECT]
+    for s in inputs:
+        assert repr(parser(s, engine='char')) == repr(parser(s, engine='token'))
+
+def test_engine_char_badinput():
+    # pylint: disable=missing-docstring,invalid-name
+    for s in ['a', '(', ')', ',', '1a2', '(]', '[)']:
+        with pytest.raises(ParserInputError):
+            parser(s, engine='char')
+
+def test_engine_token_badinput():
+    # pylint: disable=missing-docstring,invalid-name
+    for s in ['a', 'Int', 'Int 1', '"abc', '(1 2)', '() ()', '(1,"a"b)']:
+        with pytest.raises(ParserInputError):
+            parser(s, engine='token')
+
+def test_engine_unknown():
+    # pylint: disable=missing-docstring,invalid-name
+    with pytest.raises(ValueError):
+        parser('()', engine='nosuch')
+
+def feed_parser(chunks):
+    '''
+    parse the sequence of chunks with an incremental parser
+    '''
+    adt = IncrementalParser()
+    for chunk in chunks:
+        adt.feed(chunk)
+    return adt.close()
+
+def test_incremental_chunks():
+    # pylint: disable=missing-docstring,invalid-name
+    expected = repr(parser(SAMPLE_PROJECT))
+    for size in (1, 2, 3, 7, 64, len(SAMPLE_PROJECT)):
+        chunks = [SAMPLE_PROJECT[i:i+size] for i in range(0, len(SAMPLE_PROJECT), size)]
+        assert repr(feed_parser(chunks)) == expected
+
+def test_incremental_bytes():
+    # pylint: disable=missing-docstring,invalid-name
+    data = u'("\u00e9t\u00e9", 0x10)'.encode('utf-8')
+    assert feed_parser(data[i:i+1] for i in range(len(data))) == parser(data)
+
+def test_bytes_input(tmpdir):
+    # pylint: disable=missing-docstring,invalid-name
+    text = sample_with_subs(['f', 'g']) + u' '
+    text = text.replace('"f"', u'"\u00e9t\\"\u00e9\\n"')
+    data = text.encode('utf-8')
+    path = tmpdir.join('sample.adt')
+    path.write_binary(data)
+    expected = repr(parser(text))
+    with path.open('rb') as inp:
+        mapped = mmap.mmap(inp.fileno(), 0, access=mmap.ACCESS_READ)
+        for inp in (data, bytearray(data), memoryview(data), mapped):
+            assert repr(parser(inp)) == expected
+            assert repr(parser(inp, lazy=True)) == expected
+            assert repr(parser(inp, hashcons=True)) == expected
+        mapped.close()
+    assert feed_parser([data, ' ']) == parser(text)
+    assert repr(feed_parser(data[i:i+5] for i in range(0, len(data), 5))) == expected
+    for s in [b'a', b'(', b'(]', b'"abc', b'Int ']:
+        with pytest.raises(ParserInputError):
+            parser(s)
+
+def test_incremental_badinput():
+    # pylint: disable=missing-docstring,invalid-name
+    for s in ['a', '(', ')', ',', '1a2', '(]', '"abc', 'Int ']:
+        with pytest.raises(ParserInputError):
+            feed_parser(s)
+    adt = IncrementalParser()
+    adt.feed('()')
+    adt.close()
+    with pytest.raises(ParserError):
+        adt.feed('()')
+
+def sample_with_subs(names):
+    '''
+    SAMPLE_PROJECT with a copy of its subroutine for each name
+    '''
+    sub = SAMPLE_PROJECT[SAMPLE_PROJECT.index('Sub('):-len('])))')]
+    subs = ', '.join(sub.replace('"main"', '"%s"' % name) for name in names)
+    return SAMPLE_PROJECT.replace(sub, subs)
+
+def test_lazy_subs():
+    # pylint: disable=missing-docstring,invalid-name
+    text = sample_with_subs(['f(\\")', 'main'])
+    proj = bap.bir.loads(text, lazy=True)
+    subs = proj.program.subs
+    assert len(subs) == 2
+    assert subs.elements.loaded() == 0
+    assert subs[-1].name == 'main'
+    assert subs.elements.loaded() == 1
+    assert subs.find('main') is subs[1]
+    assert subs.elements.loaded() == 2
+    assert repr(proj) == repr(parser(text))
+
+def test_lazy_empty_subs():
+    # pylint: disable=missing-docstring,invalid-name
+    proj = parser('Program(Tid(1, "%1"), Attrs([]), Subs([ ]))', lazy=True)
+    assert len(proj.subs) == 0
+    with pytest.raises(ValueError):
+        parser('()', engine='char', lazy=True)
+
+def test_parallel_parser():
+    # pylint: disable=missing-docstring,invalid-name
+    for nsubs in (0, 1, 13):
+        text = sample_with_subs(['f%d' % i for i in range(nsubs)])
+        proj = parallel_parser(text, processes=2)
+        assert isinstance(proj.program.subs.elements, list)
+        assert [sub.name for sub in proj.program.subs] == ['f%d' % i for i in range(nsubs)]
+        assert repr(proj) == repr(parser(text))
+
+def test_share():
+    # pylint: disable=missing-docstring,invalid-name
+    text = sample_with_subs(['f', 'g'])
+    shared = parser(text)
+    f = shared.program.subs[0]
+    assert repr(shared) == repr(parser(text, share=False))
+    assert repr(shared) == repr(parser(text, engine='char'))
+    imms = parser('[Imm(0x20), Imm(0x20), Imm(0x40)]')
+    assert imms[0] is imms[1] and imms[0] is not imms[2]
+    imms = parser('[Imm(0x20), Imm(0x20)]', share=False)
+    assert imms[0] is not imms[1]
+    strs = parser('["main", "main"]')
+    assert strs[0] is strs[1]
+    lazy = parser(text, lazy=True)
+    assert repr(lazy.program.subs[0]) == repr(f)
+
+def test_memory_report():
+    # pylint: disable=missing-docstring,invalid-name
+    report = memory_report(sample_with_subs(['f%d' % i for i in range(10)]))
+    assert report['objects'] < report['unshared_objects']
+    assert report['saved'] == report['unshared_size'] - report['size'] > 0
+
+def test_hashcons():
+    # pylint: disable=missing-docstring,invalid-name
+    exp = 'PLUS(Var("RSP",Imm(0x40)),Int(8,64))'
+    x, y = parser('[%s, %s]' % (exp, exp), hashcons=True)
+    assert x is y
+    x, y = parser('[%s, %s]' % (exp, exp))
+    assert x is not y and x.lhs.type is y.lhs.type
+    text = sample_with_subs(['f', 'g'])
+    assert repr(parser(text, hashcons=True)) == repr(parser(text))
+    f, g = parser(text, lazy=True, hashcons=True).program.subs
+    assert f.blks[0].defs[0].rhs is g.blks[0].defs[0].rhs
+    try:
+        parser(exp, engine='char', hashcons=True)
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+
 def test_big_1():
     # pylint: disable=missing-docstring,invalid-name
     n = 1000